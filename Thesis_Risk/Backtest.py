@@ -0,0 +1,233 @@
+# VaR/CVaR visszatesztelés - Kupiec, Christoffersen, bázeli közlekedési lámpa és Acerbi-Szekely, sok konfigurációra egyszerre
+import os
+import argparse
+import itertools
+import configparser
+import numpy as np
+import pandas as pd
+from scipy.special import xlogy
+from scipy.stats import binom, chi2
+from Price_loader import load_prices
+from Rolling_risk import rolling_var_cvar, METHODS
+
+SIDES = {'long': ('long_return', 'long_var', 'long_cvar'), 'short': ('short_return', 'short_var', 'short_cvar')}
+
+# Basel zones by the binomial probability of seeing at most the observed number of exceptions
+TRAFFIC_LIGHT = ((0.95, 'green'), (0.9999, 'yellow'), (np.inf, 'red'))
+# Acerbi-Szekely Z2 critical values (5% and 0.01% significance, stable across the tested distributions)
+Z2_YELLOW = -0.70
+Z2_RED = -1.8
+
+
+def forecast_times(results_df):
+    """Date each row's forecast was made at: 'time', or the quarter end for year/quarter results."""
+    if 'time' in results_df.columns:
+        return pd.DatetimeIndex(results_df['time'])
+    quarters = pd.PeriodIndex(results_df['year'].astype(str) + 'Q' + results_df['quarter'].astype(str), freq='Q')
+    return quarters.to_timestamp(how='end')
+
+
+def align(forecasts, times, lag=True):
+    """
+    Forecasts (wide frame: forecast date index x configuration columns) for every return date.
+
+    With lag=True every day gets the last forecast made strictly before it, as for the
+    quarterly VaR made at a quarter end and used over the next quarter; lag=False takes the
+    row of the same date (daily forecasts already indexed by their target day, e.g.
+    Conditional_vol.conditional_var_cvar). Returns an array of shape (configurations, days).
+    """
+    forecasts = forecasts.sort_index(kind='stable')
+    side = 'left' if lag else 'right'
+    pos = np.searchsorted(forecasts.index.to_numpy(), pd.DatetimeIndex(times).to_numpy(), side=side) - 1
+    out = forecasts.to_numpy(dtype=float)[np.maximum(pos, 0)].T
+    out[:, pos < 0] = np.nan
+    return out
+
+
+def exceptions(returns, var):
+    """Exception indicators (return below VaR) and the mask of days that can be scored."""
+    returns = np.asarray(returns, dtype=float)
+    valid = ~np.isnan(var) & ~np.isnan(returns)
+    return valid & (returns < var), valid
+
+
+def kupiec_pof(hits, valid, alpha):
+    """Kupiec proportion-of-failures LR test per configuration (rows). Returns (n, x, lr, p)."""
+    n = valid.sum(axis=1)
+    x = hits.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = x / n
+        lr = -2 * (xlogy(n - x, 1 - alpha) + xlogy(x, alpha) - xlogy(n - x, 1 - rate) - xlogy(x, rate))
+    return n, x, lr, chi2.sf(lr, 1)
+
+
+def christoffersen(hits, valid):
+    """
+    Christoffersen independence LR test per configuration, from the exception transitions
+    between consecutive scored days. Returns (lr, p).
+    """
+    pair = valid[:, 1:] & valid[:, :-1]
+    prev, curr = hits[:, :-1], hits[:, 1:]
+    n00 = (pair & ~prev & ~curr).sum(axis=1)
+    n01 = (pair & ~prev & curr).sum(axis=1)
+    n10 = (pair & prev & ~curr).sum(axis=1)
+    n11 = (pair & prev & curr).sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pi01 = n01 / (n00 + n01)
+        pi11 = n11 / (n10 + n11)
+        pi = (n01 + n11) / (n00 + n01 + n10 + n11)
+        restricted = xlogy(n00 + n10, 1 - pi) + xlogy(n01 + n11, pi)
+        # a state never visited (n00 + n01 or n10 + n11 = 0) adds nothing to the likelihood
+        pi01, pi11 = np.nan_to_num(pi01), np.nan_to_num(pi11)
+        unrestricted = (xlogy(n00, 1 - pi01) + xlogy(n01, pi01) +
+                        xlogy(n10, 1 - pi11) + xlogy(n11, pi11))
+        lr = -2 * (restricted - unrestricted)
+    return lr, chi2.sf(lr, 1)
+
+
+def traffic_light(n, x, alpha):
+    """
+    Basel traffic-light zone per configuration: green while P(X <= x) < 95%, yellow below
+    99.99%, red above (250 days at 99% gives the usual 0-4 / 5-9 / 10+ exceptions).
+    """
+    cdf = np.where(n > 0, binom.cdf(x, n, alpha), np.nan)
+    bounds = np.array([b for b, _ in TRAFFIC_LIGHT])
+    zones = np.array([z for _, z in TRAFFIC_LIGHT], dtype=object)
+    zone = zones[np.searchsorted(bounds, np.nan_to_num(cdf), side='right').clip(max=len(zones) - 1)]
+    return np.where(n > 0, zone, None), cdf
+
+
+def acerbi_szekely(returns, es, hits, valid, alpha):
+    """
+    Acerbi-Szekely Z1 (tail mean given exceptions) and Z2 (unconditional) ES test statistics.
+
+    es is the expected shortfall in return units (negative, like long_cvar), so r / es is
+    the loss relative to the predicted tail mean. Both are 0 when ES is right and negative
+    when it is too small; Z2 below Z2_YELLOW / Z2_RED rejects at 5% / 0.01%.
+    """
+    returns = np.asarray(returns, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(hits, returns / es, 0.0)
+        ratio = np.where(np.isnan(ratio), 0.0, ratio)
+        n = valid.sum(axis=1)
+        x = hits.sum(axis=1)
+        z1 = 1 - ratio.sum(axis=1) / x
+        z2 = 1 - ratio.sum(axis=1) / (n * alpha)
+    return z1, z2
+
+
+def backtest(returns, var, es=None, confidence_level=0.975, labels=None):
+    """
+    Score aligned VaR (and optionally ES) forecasts of many configurations at once.
+
+    returns: realized returns of the days (length T); var, es: arrays (K, T) from align();
+    confidence_level: scalar or one per configuration. Every statistic is a reduction along
+    the day axis, so hundreds of configurations cost about as much as a few array passes.
+    Returns one row per configuration.
+    """
+    var = np.atleast_2d(var)
+    alpha = 1 - np.broadcast_to(np.asarray(confidence_level, dtype=float), (var.shape[0],))
+    hits, valid = exceptions(returns, var)
+    n, x, lr_pof, p_pof = kupiec_pof(hits, valid, alpha)
+    lr_ind, p_ind = christoffersen(hits, valid)
+    zone, cdf = traffic_light(n, x, alpha)
+    result = pd.DataFrame({
+        'n': n, 'exceptions': x, 'expected': n * alpha,
+        'rate': np.divide(x, n, out=np.full(len(n), np.nan), where=n > 0), 'alpha': alpha,
+        'lr_pof': lr_pof, 'p_pof': p_pof,
+        'lr_ind': lr_ind, 'p_ind': p_ind,
+        'lr_cc': lr_pof + lr_ind, 'p_cc': chi2.sf(lr_pof + lr_ind, 2),
+        'zone': zone, 'binom_cdf': cdf,
+    }, index=labels)
+    if es is not None:
+        result['z1'], result['z2'] = acerbi_szekely(returns, np.atleast_2d(es), hits, valid, alpha)
+        result['es_zone'] = np.where(result['z2'] < Z2_RED, 'red', np.where(result['z2'] < Z2_YELLOW, 'yellow', 'green'))
+        result.loc[result['z2'].isna(), 'es_zone'] = None
+    return result
+
+
+def backtest_results(results, returns_df, confidence_level=0.975, lag=True, sides=('long', 'short')):
+    """
+    Backtest the results_df of the scripts (VaR_CVaR.py, Rolling_risk, Conditional_vol, ...).
+
+    results: one results frame, or {label: frame} for many configurations (each with
+    long/short_var and long/short_cvar, dated by 'time' or year/quarter); confidence_level
+    may be a {label: level} dict. returns_df: frame with 'time', 'long_return' and
+    'short_return' (the basis data). Returns one row per configuration and side.
+    """
+    if isinstance(results, pd.DataFrame):
+        results = {'result': results}
+    labels = list(results)
+    if isinstance(confidence_level, dict):
+        confidence_level = [confidence_level[label] for label in labels]
+    times = pd.DatetimeIndex(returns_df['time'])
+    frames = []
+    for side in sides:
+        return_col, var_col, es_col = SIDES[side]
+        wide = {}
+        for col in (var_col, es_col):
+            columns = {label: pd.Series(frame[col].to_numpy(), index=forecast_times(frame))
+                       for label, frame in results.items()}
+            wide[col] = align(pd.concat(columns, axis=1), times, lag=lag)
+        scored = backtest(returns_df[return_col].to_numpy(), wide[var_col], wide[es_col], confidence_level, labels)
+        scored.insert(0, 'side', side)
+        frames.append(scored)
+    return pd.concat(frames).rename_axis('config').reset_index()
+
+
+def backtest_sweep(sweep_results, returns_df, lag=True):
+    """Backtest the 'var' rows of a Sweep.py results table, one row per (confidence level, lookback, side)."""
+    var_rows = sweep_results[sweep_results['analysis'] == 'var']
+    wide = var_rows.pivot_table(index=['confidence_level', 'lookback_q', 'time'], columns='metric', values='value')
+    results, levels = {}, {}
+    for (cl, q), frame in wide.groupby(level=['confidence_level', 'lookback_q']):
+        label = f'cl={cl:g} q={int(q)}'
+        results[label] = frame.reset_index(['confidence_level', 'lookback_q'], drop=True).reset_index()
+        levels[label] = cl
+    return backtest_results(results, returns_df, confidence_level=levels, lag=lag)
+
+
+def grid_results(long_return, methods=('normal',), confidence_levels=(0.975,), lookback_qs=(4,)):
+    """rolling_var_cvar for every method x confidence level x lookback: ({label: results}, {label: level})."""
+    results, levels = {}, {}
+    for method, cl, q in itertools.product(methods, confidence_levels, lookback_qs):
+        label = f'{method} cl={cl:g} q={q}'
+        results[label] = rolling_var_cvar(long_return, step='Q', lookback=q, confidence_level=cl, method=method)
+        levels[label] = cl
+    return results, levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest the quarterly VaR/CVaR over a grid of configurations')
+    parser.add_argument('--method', nargs='+', choices=METHODS, default=['normal', 'historical', 'cornish_fisher'])
+    parser.add_argument('--confidence-level', type=float, nargs='+', default=[0.95, 0.975, 0.99])
+    parser.add_argument('--lookback-q', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--sweep', default=None, help='score a Sweep.py results csv instead of the grid')
+    parser.add_argument('--output', default='backtest_results.csv')
+    parser.add_argument('--config', default='config.ini')
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    local_dir_base = config['Paths']['local_dir_base']
+    price_path = os.path.join(local_dir_base, config['Paths']['price_file'])
+
+    returns_df = load_prices(price_path, columns=['close']).reset_index()
+    returns_df['long_return'] = returns_df['close'].pct_change()
+    returns_df['short_return'] = -returns_df['long_return']
+
+    if args.sweep:
+        scores = backtest_sweep(pd.read_csv(args.sweep, parse_dates=['time']), returns_df)
+    else:
+        results, levels = grid_results(returns_df.set_index('time')['long_return'], args.method,
+                                       args.confidence_level, args.lookback_q)
+        scores = backtest_results(results, returns_df, confidence_level=levels)
+    scores.to_csv(args.output, index=False)
+    pd.set_option('display.width', 200)
+    print(scores[['config', 'side', 'n', 'exceptions', 'expected', 'p_pof', 'p_cc', 'zone', 'z2', 'es_zone']]
+          .to_string(index=False, float_format='{:.3f}'.format))
+    print(f"{len(scores)} rows saved: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
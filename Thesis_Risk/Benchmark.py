@@ -0,0 +1,271 @@
+# Teljesítménymérés szintetikus TTF árakon - futásidő és memória a fő számításokra, 10^3 ... 10^8 sor
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import statistics
+import numpy as np
+import pandas as pd
+from Carry import carry_adjust
+from Rolling_risk import rolling_var_cvar
+from Rolling_variance import rolling_variance
+from LPM import rolling_partial_moments
+from OEC_ingest import create_net_trade_df
+
+DEFAULT_SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+
+
+def synthetic_prices(n_rows, span_years=20, start='2000-01-01', seed=0, s0=20.0,
+                     mu=(0.0, 0.0002), sigma=(0.01, 0.04), jump_prob=(0.002, 0.01), jump_scale=(0.03, 0.08),
+                     mean_duration=(2000, 500), chunk_size=1_000_000):
+    """
+    Regime-switching jump GBM prices in the prices.xlsx schema (time index, close, Dummy).
+
+    Two regimes (Dummy 0 = calm, 1 = war-like) alternate with geometric durations (mean
+    duration in rows per regime); each regime has its own drift, volatility and Bernoulli
+    jump probability / jump size. The rows are spread evenly over span_years (daily rows for
+    small sizes), and the log returns are drawn in chunks so the temporary arrays stay small.
+    """
+    rng = np.random.default_rng(seed)
+    regime = np.empty(n_rows, dtype=np.int8)
+    pos, state = 0, 0
+    while pos < n_rows:
+        length = int(rng.geometric(1 / mean_duration[state]))
+        regime[pos:pos + length] = state
+        pos += length
+        state = 1 - state
+
+    mu, sigma = np.asarray(mu), np.asarray(sigma)
+    jump_prob, jump_scale = np.asarray(jump_prob), np.asarray(jump_scale)
+    log_price = np.empty(n_rows)
+    for lo in range(0, n_rows, chunk_size):
+        r = regime[lo:lo + chunk_size]
+        step = mu[r] - 0.5 * sigma[r] ** 2 + sigma[r] * rng.standard_normal(len(r))
+        jumps = rng.random(len(r)) < jump_prob[r]
+        step[jumps] += jump_scale[r][jumps] * rng.standard_normal(int(jumps.sum()))
+        log_price[lo:lo + chunk_size] = step
+    log_price[0] = np.log(s0)
+    np.cumsum(log_price, out=log_price)
+
+    if n_rows <= span_years * 365:
+        freq = pd.Timedelta(days=1)
+    else:
+        freq = (pd.Timedelta(days=365.25 * span_years) / n_rows).floor('us')
+    index = pd.date_range(start, periods=n_rows, freq=freq, name='time')
+    return pd.DataFrame({'close': np.exp(log_price, out=log_price), 'Dummy': regime}, index=index)
+
+
+def synthetic_carry(times, seed=0, level=1.5, speed=0.02, vol=0.05):
+    """Daily EURINTR-like rate curve (Ornstein-Uhlenbeck, in %) covering times, as load_rate_curve returns it."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range(pd.Timestamp(times.min()).normalize(), pd.Timestamp(times.max()), freq='D', name='time')
+    rate = np.empty(len(days))
+    rate[0] = level
+    shocks = vol * rng.standard_normal(len(days))
+    for i in range(1, len(days)):
+        rate[i] = rate[i - 1] + speed * (level - rate[i - 1]) + shocks[i]
+    return pd.Series(rate, index=days, name='close')
+
+
+def synthetic_oec(n_rows, seed=0, n_countries=200, years=range(2017, 2024)):
+    """OEC trade rows (Country, year, type, direction, Trade Value) as ingest() returns them."""
+    rng = np.random.default_rng(seed)
+    countries = pd.Categorical.from_codes(rng.integers(0, n_countries, n_rows),
+                                          [f'Country {i:03d}' for i in range(n_countries)])
+    years = np.asarray(list(years))
+    return pd.DataFrame({
+        'Country': countries,
+        'year': years[rng.integers(0, len(years), n_rows)],
+        'type': np.where(rng.random(n_rows) < 0.5, 'LNG', 'GAS'),
+        'direction': np.where(rng.random(n_rows) < 0.5, 'export', 'import'),
+        'Trade Value': rng.lognormal(15, 2, n_rows),
+    })
+
+
+# === Benchmarked computations: each takes the prepared inputs and returns its result ===
+
+def bench_returns(data):
+    close = data['prices']['close']
+    return close.pct_change(), -close.pct_change()
+
+
+def bench_rolling_variance(data):
+    return rolling_variance(data['prices']['close'], ['5D', '30D', '365D'])
+
+
+def bench_semi_variance(data):
+    returns = -data['prices']['close'].pct_change()
+    semi = returns.clip(upper=0.0).fillna(0.0).rolling(window=20).var()
+    lpm = rolling_partial_moments(returns, orders=[2], targets=[0.0], windows=[20])
+    return semi, lpm
+
+
+def bench_quarterly_var(data):
+    return rolling_var_cvar(data['returns'], step='Q', lookback=1, min_periods=20)
+
+
+def bench_rolling_var(data):
+    return rolling_var_cvar(data['returns'], step='Q', lookback=4, min_periods=20)
+
+
+def bench_carry(data):
+    return carry_adjust(data['frame'], data['carry'])
+
+
+def bench_net_trade(data):
+    return create_net_trade_df(data['oec'])
+
+
+CASES = {
+    'returns': bench_returns,
+    'rolling_variance': bench_rolling_variance,
+    'semi_variance': bench_semi_variance,
+    'quarterly_var_cvar': bench_quarterly_var,
+    'rolling_var_cvar': bench_rolling_var,
+    'carry_adjust': bench_carry,
+    'oec_net_trade': bench_net_trade,
+}
+
+# inputs each case reads from prepare()
+INPUTS = {
+    'returns': ['prices'],
+    'rolling_variance': ['prices'],
+    'semi_variance': ['prices'],
+    'quarterly_var_cvar': ['returns'],
+    'rolling_var_cvar': ['returns'],
+    'carry_adjust': ['frame', 'carry'],
+    'oec_net_trade': ['oec'],
+}
+
+
+def prepare(n_rows, seed=0, cases=None):
+    """
+    Synthetic inputs of n_rows for the given cases (default: all), not timed. Only the
+    inputs those cases read are built, so they do not inflate memory at large sizes.
+    """
+    needed = {name for case in (cases or CASES) for name in INPUTS[case]}
+    data = {}
+    if needed & {'prices', 'frame', 'returns', 'carry'}:
+        prices = synthetic_prices(n_rows, seed=seed)
+        if 'prices' in needed:
+            data['prices'] = prices
+        if 'frame' in needed:
+            data['frame'] = prices.reset_index()
+        if 'returns' in needed:
+            data['returns'] = prices['close'].pct_change()
+        if 'carry' in needed:
+            data['carry'] = synthetic_carry(prices.index, seed=seed)
+        del prices
+    if 'oec' in needed:
+        data['oec'] = synthetic_oec(n_rows, seed=seed)
+    return data
+
+
+def measure(func, data, repeat=3, memory=True):
+    """Wall-clock times of repeat runs, plus the tracemalloc peak of one extra run."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        times.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func(data)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return times, peak
+
+
+def environment():
+    return {'python': platform.python_version(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'machine': platform.machine(), 'system': platform.system(), 'cpus': os.cpu_count()}
+
+
+def run(sizes=DEFAULT_SIZES, cases=None, repeat=3, memory=True, seed=0):
+    """Run every case at every size; returns a list of result records."""
+    cases = list(cases or CASES)
+    records = []
+    env = environment()
+    for n_rows in sizes:
+        data = prepare(int(n_rows), seed=seed, cases=cases)
+        for case in cases:
+            times, peak = measure(CASES[case], data, repeat=repeat, memory=memory)
+            best = min(times)
+            records.append({
+                'case': case, 'rows': int(n_rows), 'repeat': repeat,
+                'best_s': best, 'median_s': statistics.median(times),
+                'rows_per_s': n_rows / best if best > 0 else None,
+                'peak_mb': None if peak is None else peak / 2 ** 20,
+                **env,
+            })
+            print(f"{case:<20} {int(n_rows):>11,} rows  {best:9.4f} s  "
+                  f"{'' if peak is None else f'{peak / 2 ** 20:9.1f} MB'}", flush=True)
+        del data
+    return records
+
+
+def compare(records, baseline, tolerance=0.25, min_seconds=0.01):
+    """
+    Cases slower than the baseline by more than tolerance (relative, on best_s).
+
+    Runs faster than min_seconds in both files are ignored, their timing is mostly noise.
+    """
+    base = {(r['case'], r['rows']): r for r in baseline}
+    regressions = []
+    for record in records:
+        old = base.get((record['case'], record['rows']))
+        if old is None or max(old['best_s'], record['best_s']) < min_seconds:
+            continue
+        ratio = record['best_s'] / old['best_s']
+        if ratio > 1 + tolerance:
+            regressions.append({'case': record['case'], 'rows': record['rows'], 'baseline_s': old['best_s'],
+                                'best_s': record['best_s'], 'ratio': ratio})
+    return regressions
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_records(records, path):
+    """One JSON object per line; an existing file is overwritten."""
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time and memory-profile the risk computations on synthetic prices.')
+    parser.add_argument('--sizes', nargs='+', type=float, default=DEFAULT_SIZES, help='row counts, e.g. 1e3 1e6 1e8')
+    parser.add_argument('--cases', nargs='+', choices=sorted(CASES), default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='skip the tracemalloc run (large sizes)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='benchmark_results.jsonl')
+    parser.add_argument('--baseline', default=None, help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown vs the baseline')
+    args = parser.parse_args()
+
+    records = run([int(n) for n in args.sizes], cases=args.cases, repeat=args.repeat,
+                  memory=not args.no_memory, seed=args.seed)
+    write_records(records, args.output)
+    print(f"{len(records)} results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(records, read_records(args.baseline), tolerance=args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['case']} @ {r['rows']:,} rows: {r['baseline_s']:.4f} s -> {r['best_s']:.4f} s "
+                  f"(x{r['ratio']:.2f})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# Bootstrap konfidencia-intervallumok a negyedéves VaR/CVaR becslésekhez
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from Risk_measures import parametric_var_cvar
+
+METRICS = ('long_var', 'short_var', 'long_cvar', 'short_cvar')
+
+
+def iid_indices(n, n_resamples, rng):
+    """(n_resamples, n) matrix of indices drawn with replacement."""
+    return rng.integers(0, n, (n_resamples, n))
+
+
+def stationary_indices(n, n_resamples, rng, mean_block=5):
+    """
+    (n_resamples, n) index matrix of the Politis-Romano stationary bootstrap.
+
+    Blocks start at a random position and have geometric lengths with mean mean_block,
+    wrapping around the end of the sample; built without Python loops.
+    """
+    new_block = rng.random((n_resamples, n)) < 1.0 / mean_block
+    new_block[:, 0] = True
+    starts = rng.integers(0, n, (n_resamples, n))
+    steps = np.arange(n)
+    block_start = np.maximum.accumulate(np.where(new_block, steps, 0), axis=1)
+    rows = np.arange(n_resamples)[:, None]
+    return (starts[rows, block_start] + steps - block_start) % n
+
+
+def resampled_risk(values, idx, confidence_level=0.975, method='normal'):
+    """VaR/CVaR of every resample (one row of idx); returns a (4, n_resamples) array."""
+    sample = values[idx]
+    if method == 'normal':
+        return np.array(parametric_var_cvar(sample.mean(axis=1), sample.std(axis=1, ddof=1),
+                                            confidence_level))
+    if method == 'historical':
+        alpha = 1 - confidence_level
+        k = max(int(np.ceil(alpha * sample.shape[1])), 1)
+        ordered = np.sort(sample, axis=1)
+        return np.array([
+            np.quantile(sample, alpha, axis=1),
+            -np.quantile(sample, 1 - alpha, axis=1),
+            ordered[:, :k].mean(axis=1),
+            -ordered[:, -k:].mean(axis=1),
+        ])
+    raise ValueError(f"Unknown method {method!r}, expected 'normal' or 'historical'")
+
+
+def bootstrap_interval(values, n_resamples=10_000, ci=0.95, scheme='iid', mean_block=5,
+                       confidence_level=0.975, method='normal', seed=None):
+    """
+    Percentile bootstrap interval of long/short VaR and CVaR for one return sample.
+
+    scheme: 'iid' or 'stationary' (block bootstrap, keeps volatility clustering).
+    Returns a dict with <metric>_lo / <metric>_hi keys.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    rng = np.random.default_rng(seed)
+    if scheme == 'iid':
+        idx = iid_indices(len(values), n_resamples, rng)
+    elif scheme == 'stationary':
+        idx = stationary_indices(len(values), n_resamples, rng, mean_block)
+    else:
+        raise ValueError(f"Unknown scheme {scheme!r}, expected 'iid' or 'stationary'")
+
+    risk = resampled_risk(values, idx, confidence_level, method)
+    lo, hi = np.nanquantile(risk, [(1 - ci) / 2, (1 + ci) / 2], axis=1)
+    out = {}
+    for i, metric in enumerate(METRICS):
+        out[metric + '_lo'] = lo[i]
+        out[metric + '_hi'] = hi[i]
+    return out
+
+
+def _interval_task(task):
+    key, values, kwargs = task
+    return key, bootstrap_interval(values, **kwargs)
+
+
+def bootstrap_groups(df, group_cols=('year', 'quarter'), return_col='long_return', n_resamples=10_000,
+                     ci=0.95, scheme='iid', mean_block=5, confidence_level=0.975, method='normal',
+                     seed=None, workers=1):
+    """
+    Bootstrap intervals for every group (quarter by default) of df, one row per group.
+
+    Groups are spread over a process pool when workers > 1; each group gets its own child
+    seed so the result does not depend on the number of workers. Only call with
+    workers > 1 from code behind an if __name__ == '__main__' guard.
+    """
+    group_cols = list(group_cols)
+    groups = [(key, group[return_col].to_numpy(dtype=float))
+              for key, group in df.groupby(group_cols)]
+    seeds = np.random.SeedSequence(seed).spawn(len(groups))
+    tasks = [(key, values, dict(n_resamples=n_resamples, ci=ci, scheme=scheme, mean_block=mean_block,
+                                confidence_level=confidence_level, method=method, seed=s))
+             for (key, values), s in zip(groups, seeds)]
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            done = list(pool.map(_interval_task, tasks, chunksize=max(1, len(tasks) // (4 * workers))))
+    else:
+        done = [_interval_task(task) for task in tasks]
+
+    rows = [dict(zip(group_cols, key), **interval) for key, interval in done]
+    return pd.DataFrame(rows)
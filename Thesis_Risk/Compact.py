@@ -0,0 +1,162 @@
+# Kompakt adattípusok - float32 árak/hozamok, kategóriás címkék, lusta naptármezők és memóriajelentés
+import os
+import numpy as np
+import pandas as pd
+
+# THESIS_COMPACT=1: load_prices / ingest return compact frames and the scripts skip the calendar columns
+ENABLED = os.environ.get('THESIS_COMPACT', '0') not in ('', '0')
+
+CALENDAR_FIELDS = ('year', 'month', 'day', 'quarter', 'year_quarter', 'date_index')
+
+
+def float32_ok(values, rtol=1e-6):
+    """True when storing values as float32 changes none of them by more than rtol (relative)."""
+    x = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(x)
+    if not finite.any():
+        return True
+    x = x[finite]
+    if np.abs(x).max() > np.finfo(np.float32).max:
+        return False
+    err = np.abs(x.astype(np.float32).astype(np.float64) - x)
+    return bool((err <= rtol * np.abs(x)).all())
+
+
+def compact_frame(df, rtol=1e-6, max_category_ratio=0.5, exclude=()):
+    """
+    Copy of df with smaller dtypes.
+
+    float64 columns become float32 where float32_ok(rtol) holds, integer columns are
+    downcast to the smallest integer type, and object/string columns whose distinct values
+    are at most max_category_ratio of the rows become categorical. The library functions
+    (Rolling_risk, LPM, Rolling_variance, ...) upcast to float64 before they accumulate.
+    """
+    out = df.copy()
+    for col in out.columns:
+        if col in exclude:
+            continue
+        series = out[col]
+        if pd.api.types.is_float_dtype(series.dtype) and series.dtype != np.float32:
+            if float32_ok(series.to_numpy(), rtol):
+                out[col] = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+            out[col] = pd.to_numeric(series, downcast='integer')
+        elif pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+            if len(series) and series.nunique(dropna=True) <= max_category_ratio * len(series):
+                out[col] = series.astype('category')
+    return out
+
+
+def _times(df):
+    if 'time' in df.columns:
+        return pd.DatetimeIndex(df['time'])
+    return pd.DatetimeIndex(df.index)
+
+
+class CalendarAccessor:
+    """
+    df.cal.year, .month, .day, .quarter, .year_quarter, .date_index: calendar fields of the
+    'time' column (or the DatetimeIndex), computed on access instead of stored. A column of
+    the same name is returned as is, so code using df.cal works on both layouts.
+    """
+
+    def __init__(self, df):
+        self._df = df
+
+    def _field(self, name):
+        if name in self._df.columns:
+            return self._df[name]
+        times = _times(self._df)
+        if name == 'year_quarter':
+            values = pd.Categorical(times.year.astype(str) + '-Q' + times.quarter.astype(str))
+        elif name == 'date_index':
+            values = times.to_period('Q').start_time
+        else:
+            values = getattr(times, name).to_numpy().astype(np.int16 if name == 'year' else np.int8)
+        return pd.Series(values, index=self._df.index, name=name)
+
+    year = property(lambda self: self._field('year'))
+    month = property(lambda self: self._field('month'))
+    day = property(lambda self: self._field('day'))
+    quarter = property(lambda self: self._field('quarter'))
+    year_quarter = property(lambda self: self._field('year_quarter'))
+    date_index = property(lambda self: self._field('date_index'))
+
+    def frame(self, fields=CALENDAR_FIELDS):
+        return pd.DataFrame({name: self._field(name) for name in fields}, index=self._df.index)
+
+
+# registered once, also when this file runs as a script and is imported again by Price_loader
+if not hasattr(pd.DataFrame, 'cal'):
+    pd.api.extensions.register_dataframe_accessor('cal')(CalendarAccessor)
+
+
+def add_calendar(df, fields=CALENDAR_FIELDS, lazy=False):
+    """
+    Store calendar columns on df (in place), as the scripts always did; with lazy=True
+    nothing is stored and the fields stay available through df.cal.
+    """
+    if lazy:
+        return df
+    times = _times(df)
+    for name in fields:
+        if name == 'year_quarter':
+            df[name] = times.year.astype(str) + '-Q' + times.quarter.astype(str)
+        elif name == 'date_index':
+            df[name] = pd.to_datetime(times.year.astype(str) + '-' + ((times.quarter * 3) - 2).astype(str) + '-01')
+        else:
+            df[name] = getattr(times, name)
+    return df
+
+
+def memory_report(frames, deep=True):
+    """
+    Memory of frames side by side: {name: (full_frame, compact_frame)}.
+
+    Returns one row per frame with rows, MB before/after and the saving in MB and percent.
+    """
+    rows = []
+    for name, (before, after) in frames.items():
+        mb_before = before.memory_usage(index=True, deep=deep).sum() / 2 ** 20
+        mb_after = after.memory_usage(index=True, deep=deep).sum() / 2 ** 20
+        rows.append({'frame': name, 'rows': len(before), 'mb_before': mb_before, 'mb_after': mb_after,
+                     'saved_mb': mb_before - mb_after,
+                     'saved_pct': 100 * (1 - mb_after / mb_before) if mb_before else 0.0})
+    return pd.DataFrame(rows).set_index('frame')
+
+
+def column_report(before, after, deep=True):
+    """Per-column dtypes and memory of a frame before and after compaction."""
+    return pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'dtype_after': after.dtypes.reindex(before.columns).astype(str),
+        'mb_before': before.memory_usage(index=False, deep=deep) / 2 ** 20,
+        'mb_after': after.memory_usage(index=False, deep=deep).reindex(before.columns) / 2 ** 20,
+    })
+
+
+if __name__ == '__main__':
+    import configparser
+    from Price_loader import load_prices
+    from OEC_ingest import ingest
+
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    local_dir_base = config['Paths']['local_dir_base']
+
+    # the frames as the scripts build them (materialized calendar, float64, object labels) vs compact mode
+    prices = load_prices(os.path.join(local_dir_base, config['Paths']['price_file']), compact=False).reset_index()
+    prices['long_return'] = prices['close'].pct_change()
+    prices['short_return'] = -prices['long_return']
+    full_prices = add_calendar(prices.copy())
+    compact_prices = compact_frame(prices)
+
+    oec_dir = os.path.join(local_dir_base, 'Thesis_Risk/OEC_gas_exp_imp')
+    oec = ingest(oec_dir, compact=False)
+    full_oec = oec.astype({col: object for col in oec.columns if isinstance(oec[col].dtype, pd.CategoricalDtype)})
+    compact_oec = ingest(oec_dir, compact=True)
+
+    pd.set_option('display.width', 200)
+    print(memory_report({'prices': (full_prices, compact_prices), 'oec': (full_oec, compact_oec)}).round(3))
+    print()
+    print(column_report(full_prices, compact_prices).round(3))
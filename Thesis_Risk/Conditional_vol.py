@@ -0,0 +1,203 @@
+# Feltételes volatilitás - RiskMetrics EWMA és GARCH(1,1), napi szigmasor a parametrikus VaR/CVaR-hoz
+import os
+import configparser
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from scipy.optimize import minimize
+from Risk_measures import parametric_var_cvar
+
+MODELS = ('ewma', 'garch')
+RISKMETRICS_LAMBDA = 0.94
+MAX_PERSISTENCE = 0.9999  # alpha + beta stays below this, the variance remains stationary
+
+
+def _valid(returns):
+    """Returns without NaNs, plus for every row the number of valid returns before it."""
+    values = np.asarray(returns, dtype=float)
+    valid = ~np.isnan(values)
+    return values[valid], np.r_[0, np.cumsum(valid)]
+
+
+def ewma_path(x, lam=RISKMETRICS_LAMBDA, seed_var=None, init_window=30):
+    """
+    One-step-ahead EWMA variances of x (no NaNs): path[t] = lam * path[t-1] + (1 - lam) * x[t-1]^2.
+
+    path has len(x) + 1 entries, path[t] uses x[:t] only; path[0] is seed_var (default:
+    mean square of the first init_window returns). The recursion is a first-order linear
+    filter, so it runs in scipy.signal.lfilter instead of a Python loop.
+    """
+    x2 = np.square(x)
+    if seed_var is None:
+        seed_var = x2[:init_window].mean() if len(x2) else np.nan
+    path = np.empty(len(x2) + 1)
+    path[0] = seed_var
+    path[1:], _ = lfilter([1 - lam], [1, -lam], x2, zi=[lam * seed_var])
+    return path
+
+
+def garch_path(x, omega, alpha, beta, seed_var):
+    """
+    One-step-ahead GARCH(1,1) variances: path[t] = omega + alpha * x[t-1]^2 + beta * path[t-1].
+
+    Same layout as ewma_path; given the parameters the recursion is linear in x^2 and also
+    runs as one lfilter call.
+    """
+    path = np.empty(len(x) + 1)
+    path[0] = seed_var
+    path[1:], _ = lfilter([1.0], [1, -beta], omega + alpha * np.square(x), zi=[beta * seed_var])
+    return path
+
+
+def _garch_params(theta, target_var):
+    # theta = (persistence, share of alpha in it): box constraints instead of alpha + beta < 1
+    persistence, share = theta
+    alpha, beta = persistence * share, persistence * (1 - share)
+    return target_var * (1 - persistence), alpha, beta
+
+
+def _garch_nll(theta, x, target_var):
+    omega, alpha, beta = _garch_params(theta, target_var)
+    var = garch_path(x, omega, alpha, beta, target_var)[:-1]
+    return 0.5 * (np.log(var).sum() + (np.square(x) / var).sum())
+
+
+def fit_garch(returns, start=(0.97, 0.08)):
+    """
+    Gaussian maximum-likelihood GARCH(1,1) on zero-mean returns, with variance targeting.
+
+    omega is tied to the sample variance (omega = var * (1 - alpha - beta)), so only the
+    persistence alpha + beta and alpha's share of it are searched (L-BFGS-B within bounds);
+    every likelihood evaluation is one vectorized filter pass. start: (persistence, share)
+    to warm-start from, e.g. the previous fit's 'theta'.
+    Returns a dict with omega, alpha, beta, loglik, n, converged and theta.
+    """
+    x = np.asarray(returns, dtype=float)
+    x = x[~np.isnan(x)]
+    target_var = np.square(x).mean()
+    fit = minimize(_garch_nll, np.clip(start, 1e-4, MAX_PERSISTENCE), args=(x, target_var), method='L-BFGS-B',
+                   bounds=[(1e-4, MAX_PERSISTENCE), (1e-4, 1.0)])
+    omega, alpha, beta = _garch_params(fit.x, target_var)
+    return {
+        'omega': omega,
+        'alpha': alpha,
+        'beta': beta,
+        'loglik': -fit.fun - 0.5 * len(x) * np.log(2 * np.pi),
+        'n': len(x),
+        'converged': bool(fit.success),
+        'theta': tuple(fit.x),
+    }
+
+
+def rolling_garch_path(x, fit_ends, window=None, min_obs=250):
+    """
+    GARCH(1,1) variance path of x with the parameters refitted after every position in fit_ends.
+
+    Each fit uses x up to and including the end (the last window rows when window is given)
+    and is warm-started from the previous one; its parameters then drive the forecasts
+    until the next refit, continuing the same variance state. Forecasts before the first
+    fit with at least min_obs returns are NaN. Returns (path, list of fit dicts).
+    """
+    path = np.full(len(x) + 1, np.nan)
+    fits = []
+    fit_ends = [int(e) for e in fit_ends if e + 1 >= min_obs]
+    start = (0.97, 0.08)
+    state = None
+    for k, end in enumerate(fit_ends):
+        lo = 0 if window is None else max(end + 1 - window, 0)
+        fit = fit_garch(x[lo:end + 1], start=start)
+        start = fit['theta']
+        fits.append({'end': end, **fit})
+        if state is None:
+            # in-sample variance at the first refit, as the fit's own filter left it
+            in_sample = garch_path(x[lo:end], fit['omega'], fit['alpha'], fit['beta'],
+                                   fit['omega'] / (1 - fit['alpha'] - fit['beta']))
+            state = in_sample[-1]
+        stop = fit_ends[k + 1] if k + 1 < len(fit_ends) else len(x)
+        segment = garch_path(x[end:stop], fit['omega'], fit['alpha'], fit['beta'], state)
+        path[end + 1:stop + 1] = segment[1:]
+        state = path[stop]
+    return path, fits
+
+
+def _fit_positions(index, refit):
+    # imported here: Rolling_risk imports this module for its 'ewma' / 'garch' methods
+    from Rolling_risk import step_ends
+    return step_ends(pd.DatetimeIndex(index), refit)[0]
+
+
+def conditional_sigma(returns, model='ewma', ahead=False, lam=RISKMETRICS_LAMBDA, refit='M', window=None,
+                      min_obs=250):
+    """
+    Daily conditional volatility of a return Series (sorted DatetimeIndex).
+
+    model: 'ewma' (RiskMetrics, decay lam) or 'garch' (GARCH(1,1) refitted at every refit step,
+    a period alias like 'M' or every N-th return; window limits the fit to the last N returns).
+    By default each day's sigma is the forecast made the day before, i.e. the one to compare
+    that day's return with; ahead=True gives the forecast for the next day made with the day's
+    own return, the as-of value at a reporting date. NaN returns leave the forecast unchanged.
+    Returns a Series named 'sigma' (GARCH: with the fits as a DataFrame in .attrs['fits']).
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model {model!r}, expected one of {MODELS}")
+    x, before = _valid(returns)
+    fits = None
+    if model == 'ewma':
+        path = ewma_path(x, lam)
+    else:
+        valid_index = returns.index[~np.isnan(np.asarray(returns, dtype=float))]
+        fit_ends = _fit_positions(valid_index, refit) if len(x) else []
+        path, fits = rolling_garch_path(x, fit_ends, window=window, min_obs=min_obs)
+        fits = pd.DataFrame(fits, columns=['end', 'omega', 'alpha', 'beta', 'loglik', 'n', 'converged'])
+        fits.insert(0, 'time', valid_index[fits.pop('end').to_numpy()])
+    positions = before[1:] if ahead else before[:-1]
+    sigma = pd.Series(np.sqrt(path[positions]), index=returns.index, name='sigma')
+    if fits is not None:
+        sigma.attrs['fits'] = fits
+    return sigma
+
+
+def conditional_var_cvar(returns, model='ewma', confidence_level=0.975, mean=0.0, ahead=False, **kwargs):
+    """
+    Daily long/short VaR and CVaR from the conditional volatility, for the whole history in one call.
+
+    mean: the expected daily return (0, the RiskMetrics convention, or a per-day array);
+    kwargs go to conditional_sigma. With ahead=False the row of day t holds the forecast made
+    at t-1, so it lines up with that day's return for backtesting.
+    Returns a DataFrame with time, return, sigma, long_var, short_var, long_cvar, short_cvar.
+    """
+    sigma = conditional_sigma(returns, model=model, ahead=ahead, **kwargs)
+    long_var, short_var, long_cvar, short_cvar = parametric_var_cvar(mean, sigma.to_numpy(), confidence_level)
+    result = pd.DataFrame({
+        'time': pd.DatetimeIndex(returns.index),
+        'return': returns.to_numpy(dtype=float),
+        'sigma': sigma.to_numpy(),
+        'long_var': long_var,
+        'short_var': short_var,
+        'long_cvar': long_cvar,
+        'short_cvar': short_cvar,
+    })
+    result.attrs.update(sigma.attrs)
+    return result
+
+
+if __name__ == '__main__':
+    from Price_loader import load_prices
+    from Export import export
+
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    local_dir_base = config['Paths']['local_dir_base']
+    price_path = os.path.join(local_dir_base, config['Paths']['price_file'])
+    output_path = os.path.join(local_dir_base, 'Thesis_Risk/VaR_CVaR')
+    os.makedirs(output_path, exist_ok=True)
+
+    long_return = load_prices(price_path, columns=['close'])['close'].pct_change()
+    for model in MODELS:
+        daily = conditional_var_cvar(long_return, model=model)
+        export(daily, os.path.join(output_path, f'conditional_var_{model}.xlsx'))
+        scored = daily.dropna(subset=['return', 'sigma'])
+        breaches = (scored['return'] < scored['long_var']).mean()
+        print(f"{model}: {len(scored)} days, long VaR breached on {breaches:.2%} of them")
+        if 'fits' in daily.attrs:
+            print(daily.attrs['fits'].tail().to_string(index=False))
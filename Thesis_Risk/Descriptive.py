@@ -1,10 +1,14 @@
 # Import necessary packages
-import numpy as np
-import seaborn as sns
 import os
 import configparser
 import pandas as pd
 import matplotlib.pyplot as plt
+from Price_loader import load_prices
+from Carry import load_rate_curve, carry_adjust
+from Parameters import load_parameters
+from Export import export
+import Instrument
+import Risk_plots
 
 # === Load configuration from config.ini ===
 def load_config(config_file):
@@ -12,103 +16,82 @@ def load_config(config_file):
     config.read(config_file)
     return config
 
-# Load configuration
-config = load_config('config.ini')
 
-# Retrieve paths from the configuration file
-local_dir_base = config['Paths']['local_dir_base']
-# Define file paths
-file_path = local_dir_base + 'Thesis_Risk/prices.xlsx'
-cost_of_carry_file = 'cost_of_carry.csv'
+def carry_prices(prices, cost_of_carry_file='cost_of_carry.csv', tolerance=None):
+    """Prices (sorted DatetimeIndex) as columns, with year and the carry adjusted price_with_carry."""
+    data = prices.reset_index()
+    data['year'] = data['time'].dt.year
 
-# Create directory for saving results if not exists
-save_dir = local_dir_base + 'Thesis_Risk/Descriptive_Statistics'
-os.makedirs(save_dir, exist_ok=True)
+    # Read cost of carry data
+    carry_rates = load_rate_curve(cost_of_carry_file)
 
-# Read and prepare data
-data = pd.read_excel(file_path)
-data['time'] = pd.to_datetime(data['time'])
-data['year'] = data['time'].dt.year
+    # As-of join: every price date gets the nearest previous rate, then the carry is applied
+    # with continuous compounding (1/360 bond convention) up to the latest date in the dataset,
+    # bringing historical prices forward to a common date, accounting for the time value of money
+    return carry_adjust(data, carry_rates, tolerance=tolerance)
 
-# Read cost of carry data
-carry_data = pd.read_csv(cost_of_carry_file, sep=';')
-carry_data['time'] = pd.to_datetime(carry_data['time'], format='%d/%m/%Y')
 
-# Create a dictionary mapping dates to rates for efficient lookup
-date_to_rate = {}
-for _, row in carry_data.sort_values('time').iterrows():
-    date_to_rate[row['time']] = row['close']
+def period_statistics(data):
+    """Descriptive statistics and skewness of price_with_carry, one column per period (war / non_war)."""
+    stats = {}
+    for name, flag in (('war', 1), ('non_war', 0)):
+        prices_with_carry = data.loc[data['Dummy'] == flag, 'price_with_carry']
+        stats[name] = pd.concat([prices_with_carry.describe(), pd.Series({'skewness': prices_with_carry.skew()})])
+    return pd.DataFrame(stats)
 
-# Function to find the nearest previous rate for a given date
-def get_closest_previous_rate(date):
-    previous_dates = [d for d in date_to_rate.keys() if d <= date]
-    if not previous_dates:
-        return np.nan
-    return date_to_rate[max(previous_dates)]
 
-# Apply the function to get carry rates for each price date
-data['carry_rate'] = data['time'].apply(get_closest_previous_rate)
+if __name__ == '__main__':
+    # Load configuration
+    config = load_config('config.ini')
+    params = load_parameters(config)
 
-# Define reference date (latest date in the dataset for forward valuation)
-reference_date = data['time'].max()
+    # Retrieve paths from the configuration file
+    local_dir_base = config['Paths']['local_dir_base']
+    # Define file paths
+    file_path = os.path.join(local_dir_base, config['Paths']['price_file'])
 
-# Calculate time difference in days between each observation and the reference date
-data['days_to_ref'] = (reference_date - data['time']).dt.days
+    # Columns of the carry corrected price export (None = every column)
+    export_columns = None
 
-# Calculate time fraction using 1/360 bond convention
-data['time_fraction'] = data['days_to_ref'] / 360
+    # Create directory for saving results if not exists
+    save_dir = local_dir_base + 'Thesis_Risk/Descriptive_Statistics'
+    os.makedirs(save_dir, exist_ok=True)
 
-# Apply the continuous compounding formula (exponential) to express all prices at the reference date
-# This brings historical prices forward to a common date, accounting for the time value of money
-data['price_with_carry'] = data['close'] * np.exp((data['carry_rate']/100) * data['time_fraction'])
+    Instrument.begin('load')
+    # Read data (cached, sorted DatetimeIndex)
+    prices = load_prices(file_path)
 
-# Save the corrected price data
-data.to_csv(os.path.join(save_dir, 'prices_with_carry.csv'), index=False)
+    Instrument.begin('carry')
+    data = carry_prices(prices, params['cost_of_carry_file'], tolerance=params['carry_tolerance'])
 
-# Split data into war and non-war periods
-war_data = data[data['Dummy'] == 1]
-non_war_data = data[data['Dummy'] == 0]
+    Instrument.begin('export')
+    # Save the corrected price data
+    export(data, os.path.join(save_dir, 'prices_with_carry.csv'), fmt=params['export_format'], columns=export_columns)
 
-# Calculate descriptive statistics for war and non-war periods with carry adjustment
-war_stats = war_data['price_with_carry'].describe()
-non_war_stats = non_war_data['price_with_carry'].describe()
+    Instrument.begin('metrics')
+    # Descriptive statistics (and skewness) for war and non-war periods with carry adjustment
+    stats = period_statistics(data)
 
-# Additional metrics: skewness for both periods
-war_skewness = war_data['price_with_carry'].skew()
-non_war_skewness = non_war_data['price_with_carry'].skew()
+    # Print descriptive statistics
+    print("=== Descriptive Statistics with Cost of Carry: War Period ===")
+    print(stats['war'].drop('skewness').rename('price_with_carry'))
+    print(f"Skewness: {stats.loc['skewness', 'war']:.4f}\n")
 
-# Print descriptive statistics
-print("=== Descriptive Statistics with Cost of Carry: War Period ===")
-print(war_stats)
-print(f"Skewness: {war_skewness:.4f}\n")
+    print("=== Descriptive Statistics with Cost of Carry: Non-War Period ===")
+    print(stats['non_war'].drop('skewness').rename('price_with_carry'))
+    print(f"Skewness: {stats.loc['skewness', 'non_war']:.4f}\n")
 
-print("=== Descriptive Statistics with Cost of Carry: Non-War Period ===")
-print(non_war_stats)
-print(f"Skewness: {non_war_skewness:.4f}\n")
+    Instrument.begin('plot')
+    # Create a new distribution plot using prices with carry
+    plt.figure(figsize=(10, 6))
 
-# Create a new distribution plot using prices with carry
-plt.figure(figsize=(10, 6))
+    # Plot KDE distributions with average markers
+    Risk_plots.draw_carry_distributions(data.loc[data['Dummy'] == 1, 'price_with_carry'],
+                                        data.loc[data['Dummy'] == 0, 'price_with_carry'])
 
-# Plot KDE distributions
-sns.kdeplot(war_data['price_with_carry'], label='Háborús időszak', color='red', fill=True)
-sns.kdeplot(non_war_data['price_with_carry'], label='Nem háborús időszak', color='blue', fill=True, alpha=0.5)
+    # Save the plot
+    plt.savefig(os.path.join(save_dir, 'distributions_with_averages_corrected.png'), dpi=300, bbox_inches='tight')
+    plt.close()
 
-# Calculate averages with carry
-war_avg = war_data['price_with_carry'].mean()
-non_war_avg = non_war_data['price_with_carry'].mean()
-
-# Add average markers
-plt.axvline(war_avg, color='red', linestyle='--', linewidth=2, label=f'Átlag (háborús): {war_avg:.2f} €')
-plt.axvline(non_war_avg, color='blue', linestyle='--', linewidth=2, label=f'Átlag (nem háborús): {non_war_avg:.2f} €')
-
-# Add title, labels, and legend
-plt.title('Áreloszlás összehasonlítása (Cost of Carry korrekciós tényezővel)')
-plt.xlabel('Záróár (€)')
-plt.ylabel('Density')
-plt.legend()
-
-# Save the plot
-plt.savefig(os.path.join(save_dir, 'distributions_with_averages_corrected.png'), dpi=300, bbox_inches='tight')
-plt.close()
-
-print(f"Corrected price distribution plot and statistics saved to {save_dir}")
+    print(f"Corrected price distribution plot and statistics saved to {save_dir}")
+    Instrument.end()
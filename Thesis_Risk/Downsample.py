@@ -0,0 +1,112 @@
+# Megjelenítéshez igazított ritkítás (LTTB / min-max) hosszú idősorok ábráihoz
+import numpy as np
+import pandas as pd
+
+# Below this many points plotting is cheap enough, series are left untouched
+MAX_POINTS = 4000
+
+
+def minmax_indices(y, n_buckets):
+    """First, last, min and max position of every bucket: spikes survive exactly."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    edges = np.linspace(0, n, n_buckets + 1).astype(int)
+    keep = [0, n - 1]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi <= lo:
+            continue
+        chunk = y[lo:hi]
+        if np.isnan(chunk).all():
+            keep.extend((lo, hi - 1))
+            continue
+        keep.extend((lo, hi - 1, lo + np.nanargmin(chunk), lo + np.nanargmax(chunk)))
+    return np.unique(keep)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: keep the point of each bucket that forms the largest
+    triangle with the previously kept point and the average of the next bucket.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        next_lo, next_hi = hi, (edges[i + 2] if i + 2 < len(edges) else n)
+        next_hi = max(next_hi, next_lo + 1)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[prev] - avg_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (avg_y - y[prev]))
+        prev = lo + (int(np.nanargmax(area)) if not np.isnan(area).all() else 0)
+        keep[i + 1] = prev
+    return np.unique(keep)
+
+
+def downsample_indices(x, y, n_out=MAX_POINTS, method='minmax', keep=None):
+    """
+    Positions to plot for one series.
+
+    method: 'minmax' (n_out / 4 buckets, 4 points each) or 'lttb'. The global minimum and
+    maximum and every position in keep (e.g. event dates, regime changes) are always kept.
+    """
+    n = len(y)
+    if n <= n_out:
+        return np.arange(n)
+    y_arr = np.asarray(y, dtype=float)
+    if method == 'minmax':
+        idx = minmax_indices(y_arr, max(n_out // 4, 1))
+    elif method == 'lttb':
+        x_arr = np.asarray(x)
+        if np.issubdtype(x_arr.dtype, np.datetime64):
+            x_arr = x_arr.astype('datetime64[ns]').astype(np.int64)
+        x_num = x_arr.astype(float)
+        valid = ~np.isnan(y_arr)
+        sub = np.flatnonzero(valid)
+        idx = sub[lttb_indices(x_num[valid], y_arr[valid], n_out)]
+    else:
+        raise ValueError(f"Unknown method {method!r}, expected 'minmax' or 'lttb'")
+
+    extra = []
+    if not np.isnan(y_arr).all():
+        extra += [np.nanargmin(y_arr), np.nanargmax(y_arr)]
+    if keep is not None:
+        extra += list(np.asarray(keep, dtype=int))
+    return np.unique(np.r_[idx, np.asarray(extra, dtype=int)])
+
+
+def event_positions(times, dates):
+    """Positions of the first rows at or after each date (the rows marking the events)."""
+    times = pd.DatetimeIndex(times)
+    pos = times.searchsorted(pd.to_datetime(list(dates)))
+    return pos[pos < len(times)]
+
+
+def downsample_frame(df, x_col, y_cols, n_out=MAX_POINTS, method='minmax', keep_dates=(), change_cols=()):
+    """
+    Rows of df to plot: the union of the downsampled positions of every y column, plus the
+    rows at keep_dates and every row where one of change_cols (e.g. Dummy) changes value.
+    x_col may be a column name or None for the index.
+    """
+    if len(df) <= n_out:
+        return df
+    x = df.index if x_col is None else df[x_col]
+    keep = list(event_positions(x, keep_dates)) if len(keep_dates) else []
+    for col in change_cols:
+        values = df[col].to_numpy()
+        changes = np.flatnonzero(values[1:] != values[:-1])
+        keep += list(changes) + list(changes + 1)
+    positions = np.unique(np.concatenate([downsample_indices(x, df[col], n_out, method, keep)
+                                          for col in y_cols]))
+    return df.iloc[positions]
+
+
+def downsample_series(series, n_out=MAX_POINTS, method='minmax', keep_dates=()):
+    """Downsample a DatetimeIndex series (e.g. rolling variance) for plotting."""
+    return downsample_frame(series.to_frame('value'), None, ['value'], n_out, method, keep_dates)['value'].rename(series.name)
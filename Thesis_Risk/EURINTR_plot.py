@@ -3,6 +3,7 @@ import os
 import configparser
 import pandas as pd
 import matplotlib.pyplot as plt
+from Plotting import show
 
 # === Load configuration from config.ini ===
 def load_config(config_file):
@@ -38,4 +39,4 @@ os.makedirs(save_dir, exist_ok=True)
 plt.savefig(os.path.join(save_dir, 'interest_rate_over_time.png'), dpi=300, bbox_inches='tight')
 
 # Show the plot
-plt.show()
+show()
@@ -0,0 +1,156 @@
+# Eseményelemzés - közös eseménykatalógus (major_events.csv), volatilitás / semi-variancia / VaR / abnormális hozam az események előtt és után
+import os
+import configparser
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from Risk_measures import parametric_var_cvar
+from Rolling_risk import window_moments
+
+DEFAULT_CATALOG = 'Thesis_Risk/major_events.csv'
+DEFAULT_WINDOWS = (5, 20, 60)
+
+
+def catalog_path(config):
+    """Path of the event catalog: events_file under [Paths] (relative to local_dir_base) or the default."""
+    return os.path.join(config['Paths']['local_dir_base'], config['Paths'].get('events_file', DEFAULT_CATALOG))
+
+
+def read_catalog(path, categories=None):
+    """
+    Event catalog as a DataFrame sorted by date: date, label, color, category, description.
+
+    Only date and label are required; color defaults to gray, description to the label.
+    categories: keep only these (e.g. ['outage', 'sanction']).
+    """
+    catalog = pd.read_csv(path, parse_dates=['date'])
+    for col, default in (('color', 'gray'), ('category', ''), ('description', None)):
+        if col not in catalog.columns:
+            catalog[col] = default
+    catalog['description'] = catalog['description'].fillna(catalog['label'])
+    catalog['color'] = catalog['color'].fillna('gray')
+    catalog['category'] = catalog['category'].fillna('')
+    if categories is not None:
+        catalog = catalog[catalog['category'].isin(categories)]
+    return catalog.sort_values('date', kind='stable').reset_index(drop=True)
+
+
+def load_events(path, categories=None):
+    """The catalog in the scripts' major_events layout: {'YYYY-MM-DD': {'label', 'color', 'description', 'category'}}."""
+    catalog = read_catalog(path, categories)
+    return {date.strftime('%Y-%m-%d'): {'label': label, 'color': color, 'description': description,
+                                        'category': category}
+            for date, label, color, description, category
+            in catalog[['date', 'label', 'color', 'description', 'category']].itertuples(index=False)}
+
+
+def _span(values, start, stop):
+    # count, mean, std of values[start:stop] for arrays of bounds (clipped to the series)
+    n = len(values)
+    start = np.clip(start, 0, n)
+    stop = np.clip(stop, start, n)
+    return window_moments(values, stop - 1, stop - start)
+
+
+def event_study(returns, events, windows=DEFAULT_WINDOWS, estimation=250, confidence_level=0.975):
+    """
+    Pre/post event statistics for every event x window length.
+
+    returns: long returns as a Series with a sorted DatetimeIndex (short = -long); events:
+    a catalog frame from read_catalog or a major_events dict. Day 0 is the first trading
+    day on or after the event date; the pre window is the w days before it, the post window
+    day 0 and the w-1 days after. Per window: volatility, downside semi-variances (LPM(2, 0)
+    of the long and of the short returns), parametric VaR and cumulative abnormal returns
+    against the mean of the estimation days before the pre window (constant mean model).
+    Statistics of a window that does not fit in the series (events too close to its start
+    or end, or outside it) are NaN; n_pre / n_post / n_estimation count the rows seen.
+
+    Every window is located by searchsorted on the time index and summarized from cumulative
+    sums, so the cost hardly depends on the number of events. Returns one row per event and window.
+    """
+    if isinstance(events, dict):
+        events = pd.DataFrame([{'date': pd.Timestamp(date), **event} for date, event in events.items()])
+    index = pd.DatetimeIndex(returns.index)
+    values = returns.to_numpy(dtype=float)
+    windows = np.asarray(windows, dtype=int)
+
+    dates = pd.DatetimeIndex(events['date']).to_numpy()
+    day0 = np.searchsorted(index.to_numpy(), dates, side='left')
+    # events before the first or after the last day of the series have no day 0
+    first_day = index[0].to_datetime64() if len(index) else np.datetime64('NaT')
+    covered = (day0 < len(index)) & (dates >= first_day)
+    pos = np.repeat(day0, len(windows))
+    w = np.tile(windows, len(day0))
+
+    downside = np.where(np.isnan(values), np.nan, np.minimum(values, 0.0) ** 2)
+    upside = np.where(np.isnan(values), np.nan, np.maximum(values, 0.0) ** 2)
+
+    n_pre, mean_pre, std_pre = _span(values, pos - w, pos)
+    n_post, mean_post, std_post = _span(values, pos, pos + w)
+    n_est, mean_est, std_est = _span(values, pos - w - estimation, pos - w)
+    semi = {name: (_span(x, pos - w, pos)[1], _span(x, pos, pos + w)[1])
+            for name, x in (('long', downside), ('short', upside))}
+    long_pre, short_pre, _, _ = parametric_var_cvar(mean_pre, std_pre, confidence_level)
+    long_post, short_post, _, _ = parametric_var_cvar(mean_post, std_post, confidence_level)
+
+    # windows cut off by the start or end of the series (or events outside it) are NaN,
+    # otherwise they would describe whatever rows happen to lie at the edge
+    in_range = np.repeat(covered, len(windows))
+    pre_ok = in_range & (pos >= w)
+    post_ok = in_range & (pos + w <= len(index))
+    est_ok = pre_ok & (pos - w - estimation >= 0)
+    for ok, arrays in ((pre_ok, [mean_pre, std_pre, long_pre, short_pre, semi['long'][0], semi['short'][0]]),
+                       (post_ok, [mean_post, std_post, long_post, short_post, semi['long'][1], semi['short'][1]]),
+                       (est_ok, [mean_est, std_est])):
+        for array in arrays:
+            array[~ok] = np.nan
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        car_pre = n_pre * (mean_pre - mean_est)
+        car = n_post * (mean_post - mean_est)
+        car_t = car / (std_est * np.sqrt(n_post))
+        vol_ratio = std_post / std_pre
+
+    result = pd.DataFrame({
+        'date': np.repeat(pd.DatetimeIndex(events['date']), len(windows)),
+        'label': np.repeat(events['label'].to_numpy(), len(windows)),
+        'category': np.repeat(events.get('category', pd.Series('', index=events.index)).to_numpy(), len(windows)),
+        'window': w,
+        'event_day': np.append(index.to_numpy(), np.datetime64('NaT', 'ns'))[np.where(in_range, pos, len(index))],
+        'n_pre': n_pre, 'n_post': n_post, 'n_estimation': n_est,
+        'pre_vol': std_pre, 'post_vol': std_post, 'vol_ratio': vol_ratio,
+        'pre_semi_long': semi['long'][0], 'post_semi_long': semi['long'][1],
+        'pre_semi_short': semi['short'][0], 'post_semi_short': semi['short'][1],
+        'pre_long_var': long_pre, 'post_long_var': long_post, 'long_var_change': long_post - long_pre,
+        'pre_short_var': short_pre, 'post_short_var': short_post, 'short_var_change': short_post - short_pre,
+        'car_pre': car_pre, 'car': car, 'car_t': car_t, 'car_p': 2 * norm.sf(np.abs(car_t)),
+    })
+    return result
+
+
+def summarize(study, by='category'):
+    """Average post/pre changes per group and window, e.g. over hundreds of outages vs sanctions."""
+    return study.groupby([by, 'window']).agg(
+        events=('label', 'size'), vol_ratio=('vol_ratio', 'mean'), long_var_change=('long_var_change', 'mean'),
+        short_var_change=('short_var_change', 'mean'), car=('car', 'mean'),
+        significant=('car_p', lambda p: (p < 0.05).mean()))
+
+
+if __name__ == '__main__':
+    from Price_loader import load_prices
+    from Export import export
+
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    local_dir_base = config['Paths']['local_dir_base']
+    price_path = os.path.join(local_dir_base, config['Paths']['price_file'])
+    output_path = os.path.join(local_dir_base, 'Thesis_Risk/Event_study')
+    os.makedirs(output_path, exist_ok=True)
+
+    long_return = load_prices(price_path, columns=['close'])['close'].pct_change()
+    study = event_study(long_return, read_catalog(catalog_path(config)))
+    export(study, os.path.join(output_path, 'event_study.xlsx'))
+    pd.set_option('display.width', 200)
+    print(study[['date', 'label', 'window', 'vol_ratio', 'long_var_change', 'short_var_change', 'car', 'car_p']]
+          .to_string(index=False))
+    print(summarize(study).round(4))
@@ -0,0 +1,147 @@
+# Eredmények exportja - Parquet / Feather / CSV / streaming xlsx, sordarabokban, oszlop- és dátumszűréssel
+import os
+import numpy as np
+import pandas as pd
+import Compact  # noqa: F401 - registers the df.cal accessor
+
+FORMATS = {'.parquet': 'parquet', '.feather': 'feather', '.csv': 'csv', '.xlsx': 'xlsx'}
+EXTENSIONS = {fmt: ext for ext, fmt in FORMATS.items()}
+
+
+def select(df, columns=None, start=None, end=None, time_col='time'):
+    """
+    Columns and date range of a frame to export.
+
+    The range [start, end] (dates or partial strings like '2021') applies to time_col, or to
+    a DatetimeIndex when the frame has no such column; the frame must be sorted by time.
+    """
+    if start is not None or end is not None:
+        if time_col in df.columns:
+            df = df.iloc[pd.DatetimeIndex(df[time_col]).slice_indexer(start, end)]
+        else:
+            df = df.loc[start:end]
+    if columns is not None:
+        df = df[list(columns)]
+    return df
+
+
+def iter_chunks(df, chunk_size=100_000, calendar=None):
+    """
+    Consecutive row slices of df (views, no copies). calendar: names of Compact calendar
+    fields (year, quarter, ...) to materialize on each chunk only, for compact frames.
+    """
+    for start in range(0, max(len(df), 1), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        if calendar:
+            chunk = pd.concat([chunk, chunk.cal.frame(calendar)], axis=1)
+        yield chunk
+
+
+def _cell(value):
+    # xlsx cells: NaN / NaT become empty, numpy scalars plain Python values
+    if value is None or value is pd.NaT or (isinstance(value, float) and np.isnan(value)):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+def _xlsx_rows(chunks, index):
+    """Header row, then the rows of every chunk as lists of plain Python values."""
+    header = False
+    for chunk in chunks:
+        if not header:
+            yield ([chunk.index.name or ''] if index else []) + [str(c) for c in chunk.columns]
+            header = True
+        columns = ([chunk.index] if index else []) + [chunk[c] for c in chunk.columns]
+        for row in zip(*[col.to_numpy(dtype=object) for col in columns]):
+            yield [_cell(v) for v in row]
+
+
+def _write_xlsx(chunks, path, sheet_name, index):
+    rows = _xlsx_rows(chunks, index)
+    try:
+        import xlsxwriter
+    except ImportError:
+        xlsxwriter = None
+
+    if xlsxwriter is not None:
+        # constant_memory: every row is flushed to disk once the next one starts
+        wb = xlsxwriter.Workbook(path, {'constant_memory': True, 'nan_inf_to_errors': True,
+                                        'default_date_format': 'yyyy-mm-dd hh:mm:ss'})
+        ws = wb.add_worksheet(sheet_name)
+        for r, row in enumerate(rows):
+            ws.write_row(r, 0, row)
+        wb.close()
+        return
+
+    from openpyxl import Workbook
+    # write_only: rows are streamed to the file, memory does not grow with the row count
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    for row in rows:
+        ws.append(row)
+    wb.save(path)
+
+
+def _write_arrow(chunks, path, fmt, index):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=index)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(path, schema) if fmt == 'parquet' else pa.ipc.new_file(path, schema)
+            table = table.cast(schema)
+            if fmt == 'parquet':
+                writer.write_table(table)
+            else:
+                writer.write(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_chunks(chunks, path, fmt=None, index=False, sheet_name='Sheet1'):
+    """
+    Write an iterable of DataFrame chunks (same columns) to one file, one chunk at a time.
+
+    fmt: 'parquet', 'feather', 'csv' or 'xlsx'; default from the file extension. Parquet
+    gets one row group per chunk, Feather one record batch per chunk, CSV is appended and
+    xlsx is streamed row by row (xlsxwriter constant_memory, or openpyxl write_only).
+    """
+    fmt = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unknown export format for {path!r}, expected one of {sorted(EXTENSIONS)}")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            for i, chunk in enumerate(chunks):
+                chunk.to_csv(f, index=index, header=(i == 0))
+    elif fmt == 'xlsx':
+        _write_xlsx(chunks, path, sheet_name, index)
+    else:
+        _write_arrow(chunks, path, fmt, index)
+    return path
+
+
+def export(df, path, fmt=None, columns=None, start=None, end=None, time_col='time', chunk_size=100_000,
+           index=False, sheet_name='Sheet1', calendar=None):
+    """
+    Export the selected columns and date range of df in row chunks.
+
+    When fmt is given and path has a different extension, the extension is replaced, so a
+    script setting like export_format = 'parquet' redirects basis.xlsx to basis.parquet.
+    Returns the path written.
+    """
+    if fmt is not None:
+        stem, ext = os.path.splitext(path)
+        if ext.lower() != EXTENSIONS.get(fmt, ext.lower()):
+            path = stem + EXTENSIONS[fmt]
+    df = select(df, columns=columns, start=start, end=end, time_col=time_col)
+    return write_chunks(iter_chunks(df, chunk_size, calendar), path, fmt=fmt, index=index, sheet_name=sheet_name)
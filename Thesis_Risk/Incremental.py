@@ -0,0 +1,160 @@
+# Inkrementális frissítés - új napi záróárak hozzáfűzése a teljes idősor újraszámolása nélkül
+import os
+import pickle
+import configparser
+from collections import deque
+import numpy as np
+import pandas as pd
+from Price_loader import load_prices
+from Risk_measures import parametric_var_cvar
+
+STATE_VERSION = 1
+
+
+class WindowStats:
+    """
+    Welford mean/variance over a sliding window with O(1) add and remove.
+
+    size: fixed number of observations (like rolling(20)), or a Timedelta / string such
+    as '30D' for a time-based window closed on the right (like rolling('30D')).
+    """
+
+    def __init__(self, size):
+        self.by_time = isinstance(size, (str, pd.Timedelta))
+        self.size = pd.Timedelta(size) if self.by_time else int(size)
+        self.buffer = deque()
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def _add(self, x):
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+
+    def _remove(self, x):
+        self.n -= 1
+        if self.n == 0:
+            self.mean = self.m2 = 0.0
+            return
+        d = x - self.mean
+        self.mean -= d / self.n
+        self.m2 -= d * (x - self.mean)
+
+    def push(self, x, time=None):
+        """Add one observation (NaN is kept in the window but not in the moments)."""
+        self.buffer.append((time, x))
+        if x == x:
+            self._add(x)
+        if self.by_time:
+            while self.buffer and self.buffer[0][0] <= time - self.size:
+                _, old = self.buffer.popleft()
+                if old == old:
+                    self._remove(old)
+        elif len(self.buffer) > self.size:
+            _, old = self.buffer.popleft()
+            if old == old:
+                self._remove(old)
+
+    def var(self, min_periods=2):
+        if self.n < max(min_periods, 2):
+            return np.nan
+        return max(self.m2, 0.0) / (self.n - 1)
+
+
+def new_state(variance_window='30D', semi_window=20, var_window=252, confidence_level=0.975):
+    """Empty running state for the Variance.py, Semi_Var.py and VaR/CVaR rolling windows."""
+    return {
+        'version': STATE_VERSION,
+        'last_time': None,
+        'last_close': np.nan,
+        'confidence_level': confidence_level,
+        'variance': WindowStats(variance_window),
+        'semi_variance': WindowStats(semi_window),
+        'var': WindowStats(var_window),
+    }
+
+
+def update(state, prices):
+    """
+    Feed new closes (Series with DatetimeIndex, only dates after state['last_time'] are used).
+
+    Costs O(len(prices)) whatever the length of the history. Returns one row per new date:
+    rolling_var (close), semi_variance (short side, as in Semi_Var.py), long/short VaR and CVaR.
+    """
+    prices = prices.sort_index()
+    if state['last_time'] is not None:
+        prices = prices[prices.index > state['last_time']]
+
+    rows = []
+    semi_min = state['semi_variance'].size
+    for time, close in prices.items():
+        long_return = close / state['last_close'] - 1
+        short_return = -long_return
+        filtered_ret = short_return if short_return < 0.0 else 0.0
+
+        state['variance'].push(close, time)
+        state['semi_variance'].push(filtered_ret)
+        state['var'].push(long_return)
+
+        mean, std = state['var'].mean, np.sqrt(state['var'].var(min_periods=20))
+        long_var, short_var, long_cvar, short_cvar = parametric_var_cvar(mean, std, state['confidence_level'])
+        rows.append({
+            'time': time,
+            'close': close,
+            'long_return': long_return,
+            'rolling_var': state['variance'].var(),
+            'semi_variance': state['semi_variance'].var(min_periods=semi_min),
+            'long_var': float(long_var),
+            'short_var': float(short_var),
+            'long_cvar': float(long_cvar),
+            'short_cvar': float(short_cvar),
+        })
+        state['last_time'] = time
+        state['last_close'] = close
+    return pd.DataFrame(rows)
+
+
+def load_state(path):
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def save_state(state, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def append_prices(prices, state_path, output_path, **window_kwargs):
+    """
+    Update the persisted state with the new closes and append the new rows to output_path (csv).
+
+    The first call (no state file yet) replays the full history once.
+    """
+    state = load_state(state_path) or new_state(**window_kwargs)
+    new_rows = update(state, prices)
+    if len(new_rows):
+        new_rows.to_csv(output_path, mode='a', index=False, header=not os.path.exists(output_path))
+    save_state(state, state_path)
+    return new_rows
+
+
+if __name__ == '__main__':
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    local_dir_base = config['Paths']['local_dir_base']
+    price_path = os.path.join(local_dir_base, config['Paths']['price_file'])
+    state_path = os.path.join(local_dir_base, 'Thesis_Risk/.cache/risk_state.pkl')
+    output_path = os.path.join(local_dir_base, 'Thesis_Risk/risk_history.csv')
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+
+    closes = load_prices(price_path, columns=['close'])['close']
+    added = append_prices(closes, state_path, output_path)
+    print(f"{len(added)} new rows appended to {output_path}")
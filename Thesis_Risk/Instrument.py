@@ -0,0 +1,180 @@
+# Szakaszonkénti futásidő- és memóriamérés - THESIS_PROFILE=1 (vagy egy fájlnév) kapcsolja be, JSON lines kimenet
+import os
+import sys
+import atexit
+import json
+import time
+import datetime
+import functools
+import threading
+import tracemalloc
+from contextlib import nullcontext
+
+# THESIS_PROFILE=1 -> profile.jsonl in the working directory, THESIS_PROFILE=<path> -> that file
+_setting = os.environ.get('THESIS_PROFILE', '')
+ENABLED = _setting not in ('', '0')
+OUTPUT = _setting if _setting not in ('', '0', '1') else 'profile.jsonl'
+# THESIS_PROFILE_MEMORY=0 keeps the timings but skips tracemalloc (it slows allocations down)
+MEMORY = os.environ.get('THESIS_PROFILE_MEMORY', '1') not in ('', '0')
+
+_NOOP = nullcontext()
+_lock = threading.Lock()
+_local = threading.local()
+_run = {'id': None, 'start': None, 'file': None}
+_current = None  # stage opened by begin()
+
+
+def enable(path=None, memory=None):
+    """Turn instrumentation on (e.g. from a --profile command line switch)."""
+    global ENABLED, OUTPUT, MEMORY
+    ENABLED = True
+    if path:
+        OUTPUT = path
+    if memory is not None:
+        MEMORY = memory
+
+
+def disable():
+    global ENABLED
+    end()
+    ENABLED = False
+
+
+def _start_run():
+    if _run['id'] is None:
+        _run['id'] = datetime.datetime.now().isoformat(timespec='milliseconds')
+        _run['start'] = time.perf_counter()
+    if MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def _write(record):
+    with _lock:
+        if _run['file'] is None:
+            _run['file'] = open(OUTPUT, 'a', encoding='utf-8')
+        _run['file'].write(json.dumps(record, sort_keys=True) + '\n')
+        _run['file'].flush()
+
+
+class _Stage:
+    """One measured stage; nested stages report their own numbers and a '/'-joined path."""
+
+    def __init__(self, name, tags):
+        self.name = name
+        self.tags = tags
+
+    def __enter__(self):
+        _start_run()
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1] if stack else None
+        self.path = self.name if self.parent is None else self.parent.path + '/' + self.name
+        self.peak = 0
+        if MEMORY:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent is not None:
+                self.parent.peak = max(self.parent.peak, peak)
+            tracemalloc.reset_peak()
+            self.base = current
+        stack.append(self)
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.wall
+        cpu = time.process_time() - self.cpu
+        _local.stack.pop()
+        record = {
+            'run': _run['id'],
+            'script': os.path.basename(sys.argv[0]),
+            'stage': self.path,
+            'start_s': round(self.wall - _run['start'], 6),
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'peak_mb': None,
+            'error': exc_type.__name__ if exc_type else None,
+            **self.tags,
+        }
+        if MEMORY and tracemalloc.is_tracing():
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            record['peak_mb'] = round((peak - self.base) / 2 ** 20, 3)
+            if self.parent is not None:
+                self.parent.peak = max(self.parent.peak, peak)
+            tracemalloc.reset_peak()
+        _write(record)
+        return False
+
+
+def stage(name, **tags):
+    """
+    Context manager measuring wall time, CPU time and peak traced memory of a block.
+
+    When instrumentation is off this returns a shared no-op context, so instrumented code
+    costs one function call. peak_mb is the peak above the memory in use when the stage began.
+    """
+    if not ENABLED:
+        return _NOOP
+    return _Stage(name, tags)
+
+
+def profiled(name=None):
+    """Decorator form of stage(); the stage name defaults to the function name."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _Stage(name or func.__name__, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def begin(name, **tags):
+    """Close the stage opened by the previous begin() and open a new one (for flat scripts)."""
+    global _current
+    if not ENABLED:
+        return
+    end()
+    _current = _Stage(name, tags)
+    _current.__enter__()
+
+
+def end():
+    """Close the stage opened by begin(), if any."""
+    global _current
+    if _current is not None:
+        stage_, _current = _current, None
+        stage_.__exit__(None, None, None)
+
+
+# a stage left open by begin() is closed when the script exits
+atexit.register(end)
+
+
+def read_profile(path=OUTPUT):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def compare_runs(records, script=None):
+    """Per-stage wall/CPU time and peak memory of the last two runs (of one script), side by side."""
+    import pandas as pd
+    df = pd.DataFrame(records)
+    if script is not None:
+        df = df[df['script'] == script]
+    runs = sorted(df['run'].unique())[-2:]
+    df = df[df['run'].isin(runs)]
+    table = df.groupby(['script', 'stage', 'run'], sort=False)[['wall_s', 'cpu_s', 'peak_mb']].sum().unstack('run')
+    if len(runs) == 2:
+        table[('wall_s', 'change')] = table[('wall_s', runs[1])] / table[('wall_s', runs[0])] - 1
+    return table
+
+
+if __name__ == '__main__':
+    import pandas as pd
+    pd.set_option('display.width', 200)
+    print(compare_runs(read_profile(sys.argv[1] if len(sys.argv) > 1 else OUTPUT),
+                       script=sys.argv[2] if len(sys.argv) > 2 else None).to_string())
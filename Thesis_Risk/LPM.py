@@ -0,0 +1,54 @@
+# Alsó/felső parciális momentumok - gördülő LPM(k, tau) sok (k, tau, ablak) kombinációra egyszerre
+import numpy as np
+import pandas as pd
+
+
+def _window_sums(cs, windows, n):
+    """Rolling sums over count-based windows from one cumulative sum (leading 0 included)."""
+    ends = np.arange(1, n + 1)
+    return {w: cs[ends] - cs[np.maximum(ends - w, 0)] for w in windows}
+
+
+def rolling_partial_moments(returns, orders=(2,), targets=(0.0,), windows=(20,), upper=False, min_periods=None):
+    """
+    Rolling lower partial moments LPM(k, tau) = mean(max(tau - r, 0) ** k) over the last
+    `window` rows, for every order k, target tau and window at once.
+
+    upper=True gives the upper partial moments mean(max(r - tau, 0) ** k) (short side).
+    Order 0 is the shortfall probability. One cumulative sum per (k, tau) serves all
+    windows. NaN returns are left out of both the sum and the count; min_periods defaults
+    to the window length, like pandas rolling.
+    Returns a DataFrame with (k, target, window) column levels, aligned with returns.
+    """
+    index = returns.index if isinstance(returns, pd.Series) else None
+    r = np.asarray(returns, dtype=float)
+    valid = ~np.isnan(r)
+    n = len(r)
+
+    counts = _window_sums(np.r_[0, np.cumsum(valid)], windows, n)
+    columns, data = [], []
+    for tau in targets:
+        gap = np.where(valid, (r - tau) if upper else (tau - r), 0.0)
+        below = np.maximum(gap, 0.0)
+        for k in orders:
+            powered = (gap > 0).astype(float) if k == 0 else below ** k
+            sums = _window_sums(np.r_[0.0, np.cumsum(powered)], windows, n)
+            for w in windows:
+                count = counts[w]
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    moment = sums[w] / count
+                moment[count < (w if min_periods is None else min_periods)] = np.nan
+                columns.append((k, tau, w))
+                data.append(moment)
+
+    out = pd.DataFrame(np.column_stack(data) if data else np.empty((n, 0)), index=index,
+                       columns=pd.MultiIndex.from_tuples(columns, names=['k', 'target', 'window']))
+    return out
+
+
+def downside_risk(returns, orders=(2,), targets=(0.0,), windows=(20,), min_periods=None):
+    """Lower and upper partial moments side by side, with an extra 'side' column level ('lpm'/'upm')."""
+    return pd.concat({
+        'lpm': rolling_partial_moments(returns, orders, targets, windows, upper=False, min_periods=min_periods),
+        'upm': rolling_partial_moments(returns, orders, targets, windows, upper=True, min_periods=min_periods),
+    }, axis=1, names=['side'])
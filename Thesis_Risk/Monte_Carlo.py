@@ -0,0 +1,137 @@
+# Monte Carlo VaR/CVaR - több napos horizont, kötegelt NumPy szimuláció, folyamatokra bontva
+import math
+import os
+import configparser
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.stats import t as student_t
+from Price_loader import load_prices
+
+MODELS = ('normal', 't', 'bootstrap')
+
+
+def fit_model(returns, model='normal'):
+    """
+    Fit the daily return model the paths are drawn from.
+
+    normal: mean/std, t: Student-t by maximum likelihood, bootstrap: the observed returns.
+    """
+    values = np.asarray(returns, dtype=float)
+    values = values[~np.isnan(values)]
+    if model == 'normal':
+        return {'model': model, 'loc': values.mean(), 'scale': values.std(ddof=1)}
+    if model == 't':
+        df, loc, scale = student_t.fit(values)
+        return {'model': model, 'df': df, 'loc': loc, 'scale': scale}
+    if model == 'bootstrap':
+        return {'model': model, 'sample': values}
+    raise ValueError(f"Unknown model {model!r}, expected one of {MODELS}")
+
+
+def draw_returns(params, size, rng):
+    """Draw a (paths, horizon) block of daily returns from a fitted model."""
+    if params['model'] == 'normal':
+        return rng.normal(params['loc'], params['scale'], size)
+    if params['model'] == 't':
+        return params['loc'] + params['scale'] * rng.standard_t(params['df'], size)
+    sample = params['sample']
+    return sample[rng.integers(0, len(sample), size)]
+
+
+def horizon_returns(params, n_paths, horizon, rng):
+    """
+    Compounded horizon return of every path: prod(1 + r) - 1 over the horizon.
+
+    Normal and t draws below -100% are floored at -1 (the price cannot go below zero), so
+    such a path is a total loss instead of a NaN that np.partition would drop from the tails.
+    """
+    daily = np.maximum(draw_returns(params, (n_paths, horizon), rng), -1.0)
+    with np.errstate(divide='ignore'):
+        result = np.expm1(np.log1p(daily).sum(axis=1))
+    if not np.isfinite(result).all():
+        raise FloatingPointError(f"{params['model']} model produced non-finite {horizon}-day returns")
+    return result
+
+
+def _merge_tails(lower, upper, chunk, k):
+    """Keep the k smallest and k largest values seen so far."""
+    lower = np.concatenate([lower, chunk])
+    upper = np.concatenate([upper, chunk])
+    if len(lower) > k:
+        lower = np.partition(lower, k - 1)[:k]
+        upper = np.partition(upper, len(upper) - k)[-k:]
+    return lower, upper
+
+
+def simulate_tails(params, n_paths, horizon, k, seed, chunk_size=250_000):
+    """
+    Simulate n_paths in chunks and return the k worst and k best horizon returns.
+
+    Memory stays at chunk_size x horizon draws plus the two tails, whatever n_paths is.
+    """
+    rng = np.random.default_rng(seed)
+    lower = upper = np.empty(0)
+    done = 0
+    while done < n_paths:
+        size = min(chunk_size, n_paths - done)
+        lower, upper = _merge_tails(lower, upper, horizon_returns(params, size, horizon, rng), k)
+        done += size
+    return lower, upper
+
+
+def _simulate_tails_task(task):
+    return simulate_tails(*task)
+
+
+def monte_carlo_var(returns, model='normal', horizon=1, n_paths=1_000_000, confidence_level=0.975,
+                    chunk_size=250_000, workers=1, seed=None):
+    """
+    Simulated long/short VaR and CVaR of the compounded return over horizon days.
+
+    Paths are split across workers processes; each worker gets its own child of one
+    SeedSequence, so a given (seed, workers) pair always reproduces the same result.
+    Only the tails are kept, so the estimate is exact while memory stays bounded.
+    """
+    params = fit_model(returns, model)
+    alpha = 1 - confidence_level
+    k = max(math.ceil(alpha * n_paths), 1)
+
+    workers = max(1, min(workers, n_paths))
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    shares = [n_paths // workers + (i < n_paths % workers) for i in range(workers)]
+    tasks = [(params, share, horizon, min(k, share), s, chunk_size) for share, s in zip(shares, seeds)]
+
+    if workers == 1:
+        parts = [_simulate_tails_task(tasks[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_tails_task, tasks))
+
+    lower = np.partition(np.concatenate([p[0] for p in parts]), k - 1)[:k]
+    upper = np.partition(np.concatenate([p[1] for p in parts]), -k)[-k:]
+    return {
+        'model': model,
+        'horizon': horizon,
+        'n_paths': n_paths,
+        'long_var': float(lower.max()),
+        'short_var': float(-upper.min()),
+        'long_cvar': float(lower.mean()),
+        'short_cvar': float(-upper.mean()),
+    }
+
+
+if __name__ == '__main__':
+    import pandas as pd
+
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    local_dir_base = config['Paths']['local_dir_base']
+    price_path = os.path.join(local_dir_base, config['Paths']['price_file'])
+
+    prices = load_prices(price_path, columns=['close'])
+    long_return = prices['close'].pct_change().dropna()
+
+    results = [monte_carlo_var(long_return, model=model, horizon=horizon, n_paths=1_000_000,
+                               workers=os.cpu_count() or 1, seed=2022)
+               for model in MODELS for horizon in (1, 5, 10, 20)]
+    print(pd.DataFrame(results).to_string(index=False))
@@ -0,0 +1,158 @@
+# OEC kereskedelmi adatok betöltése - fájlok felderítése glob-bal, párhuzamos olvasás, particionált Parquet
+import os
+import re
+import glob
+import configparser
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from pandas.api.types import union_categoricals
+import Compact
+
+# OEC export file names: <Exporters|Importers>-of-<product>-<year>-Click-to-Select-a-Country.csv
+FILE_PATTERN = re.compile(r'^(?P<direction>Exporters|Importers)-of-(?P<product>.+)-(?P<year>\d{4})-Click-to-Select')
+
+# Short labels for the products already used in the thesis; other HS products keep their slug
+PRODUCT_TYPES = {
+    'Natural-gas-liquefied': 'LNG',
+    'Natural-gas-in-gaseous-state': 'GAS',
+}
+
+CATEGORICAL_COLUMNS = ['Continent ID', 'Continent', 'Country ID', 'Country', 'ISO 3']
+DTYPES = {**{col: 'category' for col in CATEGORICAL_COLUMNS}, 'Trade Value': 'float64'}
+# files without these cannot be used; the other label columns vary by HS code and year and may be missing
+REQUIRED_COLUMNS = ['Country', 'Trade Value']
+
+
+def parse_filename(path):
+    """Return {'direction', 'type', 'year'} from an OEC export file name, or None if it does not match."""
+    match = FILE_PATTERN.match(os.path.basename(path))
+    if match is None:
+        return None
+    return {
+        'direction': 'export' if match['direction'] == 'Exporters' else 'import',
+        'type': PRODUCT_TYPES.get(match['product'], match['product']),
+        'year': int(match['year']),
+    }
+
+
+def discover_files(root, pattern='**/*.csv', years=None, types=None):
+    """Find OEC export files under root and parse their metadata; unmatched files are skipped."""
+    found = []
+    for path in sorted(glob.glob(os.path.join(root, pattern), recursive=True)):
+        meta = parse_filename(path)
+        if meta is None:
+            continue
+        if years is not None and meta['year'] not in years:
+            continue
+        if types is not None and meta['type'] not in types:
+            continue
+        found.append({'path': path, **meta})
+    return found
+
+
+def read_file(file_meta):
+    """
+    Read one OEC csv with explicit dtypes and add direction/type/year.
+
+    Label columns missing from the file are added empty (categorical), so every frame has
+    the DTYPES columns; a file without a REQUIRED_COLUMNS column raises ValueError.
+    """
+    data = pd.read_csv(file_meta['path'], dtype=DTYPES)
+    missing = [col for col in REQUIRED_COLUMNS if col not in data.columns]
+    if missing:
+        raise ValueError(f"{file_meta['path']}: missing column(s) {missing}")
+    # empty categories of the same dtype as the file's own labels, so union_categoricals accepts them
+    no_labels = pd.Index([], dtype=data['Country'].cat.categories.dtype)
+    for col in CATEGORICAL_COLUMNS:
+        if col not in data.columns:
+            data[col] = pd.Categorical([None] * len(data), categories=no_labels)
+    data = data[list(DTYPES) + [col for col in data.columns if col not in DTYPES]]
+    data['direction'] = file_meta['direction']
+    data['year'] = file_meta['year']
+    data['type'] = file_meta['type']
+    return data
+
+
+def ingest(root, years=None, types=None, workers=8, compact=None):
+    """
+    Read every OEC file under root in parallel into one frame.
+
+    The label columns stay categorical: their categories are unified across files first,
+    so the single concat does not fall back to object columns. compact (default: the
+    THESIS_COMPACT switch) also makes direction/type categorical and downcasts year.
+    """
+    files = discover_files(root, years=years, types=types)
+    if not files:
+        return pd.DataFrame(columns=list(DTYPES) + ['direction', 'year', 'type'])
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(read_file, files))
+
+    for col in CATEGORICAL_COLUMNS:
+        categories = union_categoricals([frame[col] for frame in frames]).categories
+        for frame in frames:
+            frame[col] = frame[col].cat.set_categories(categories)
+    data = pd.concat(frames, ignore_index=True)
+    if Compact.ENABLED if compact is None else compact:
+        # trade values are summed per country, they stay float64
+        data = Compact.compact_frame(data, exclude=['Trade Value'])
+    return data
+
+
+def create_net_trade_df(merged_data, years=None, types=None):
+    """
+    Net trade (export - import) per year, country and type with one pivot over
+    (year, country, type, direction). Every country gets a row for every year/type,
+    zero where it did not trade. Years and types default to those present in the data.
+    """
+    years = sorted(merged_data['year'].unique()) if years is None else list(years)
+    types = sorted(merged_data['type'].unique()) if types is None else list(types)
+    countries = merged_data['Country'].unique()
+
+    pivot = merged_data.pivot_table(index=['Country', 'year', 'type'], columns='direction',
+                                    values='Trade Value', aggfunc='sum', fill_value=0, observed=True)
+    full_index = pd.MultiIndex.from_product([countries, years, types], names=['Country', 'year', 'type'])
+    pivot = pivot.reindex(index=full_index, columns=['export', 'import'], fill_value=0)
+
+    net_trade = pd.DataFrame({
+        'year': full_index.get_level_values('year'),
+        'country': full_index.get_level_values('Country'),
+        'type': full_index.get_level_values('type'),
+        'exp': pivot['export'].to_numpy(),
+        'imp': pivot['import'].to_numpy(),
+    })
+    net_trade['net_trade'] = net_trade['exp'] - net_trade['imp']
+    return net_trade
+
+
+def write_dataset(data, path):
+    """Write a year/type (product) partitioned Parquet dataset; rewritten partitions replace the old ones."""
+    data.to_parquet(path, partition_cols=['year', 'type'], index=False,
+                    existing_data_behavior='delete_matching')
+
+
+def read_dataset(path, years=None, types=None, columns=None):
+    """Read only the requested year/type partitions of the dataset."""
+    filters = []
+    if years is not None:
+        filters.append(('year', 'in', list(years)))
+    if types is not None:
+        filters.append(('type', 'in', list(types)))
+    data = pd.read_parquet(path, columns=columns, filters=filters or None)
+    for col in ('year', 'type'):
+        if col in data.columns:
+            data[col] = data[col].astype(int if col == 'year' else str)
+    return data
+
+
+if __name__ == '__main__':
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    local_dir_base = config['Paths']['local_dir_base']
+    oec_dir = os.path.join(local_dir_base, 'Thesis_Risk/OEC_gas_exp_imp')
+
+    oec_data = ingest(oec_dir)
+    dataset_path = os.path.join(oec_dir, 'dataset')
+    write_dataset(oec_data, dataset_path)
+    print(f"{len(oec_data)} rows from {oec_data.groupby(['year', 'type', 'direction']).ngroups} files "
+          f"saved to {dataset_path}")
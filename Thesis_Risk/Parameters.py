@@ -0,0 +1,41 @@
+# Paraméterek - az elemzések közös beállításai a config.ini [Parameters] szakaszából (a szkriptek és a Pipeline is innen olvas)
+
+# Defaults for a config.ini without a [Parameters] section (or without some of its keys)
+DEFAULTS = {
+    'confidence_level': 0.975,  # Confidence level for VaR and CVaR
+    'lookback_q': 4,  # Number of quarters to look back for VaR calculation
+    'var_method': 'normal',  # 'normal' (parametric), 'historical', 'cornish_fisher', 'ewma' or 'garch'
+    'n_resamples': 10000,  # Bootstrap resamples per quarter
+    'bootstrap_scheme': 'stationary',  # 'iid' or 'stationary' (block bootstrap)
+    'lookback_roll': 30,  # Rolling variance window of Variance.py, in days
+    'lookback_window': 20,  # Rolling semi-variance / LPM window of Semi_Var.py, in rows
+    'lpm_order': 2,  # LPM(k, tau) order, 2 = semi-variance around the target
+    'lpm_target': 0.0,  # LPM target return (tau)
+    'start_period': 2019,  # First year of Semi_Var.py
+    'end_period': 2025,  # Last year of Semi_Var.py
+    'n_permutations': 10000,  # Permutation resamples of the Brown-Forsythe test per year (0 = no permutation p-value)
+    'permutation_seed': 2022,  # Seed of the permutation test
+    'test_workers': 0,  # Processes for the permutation test (0 = one per CPU)
+    'cost_of_carry_file': 'cost_of_carry.csv',  # Relative to the working directory
+    'carry_tolerance': None,  # Maximum age of the rate used for a price date, e.g. 7D (None = no limit)
+    'export_format': None,  # 'xlsx', 'csv', 'parquet' or 'feather' for every export (None = the file's own)
+}
+
+
+def load_parameters(config):
+    """
+    The [Parameters] of config.ini as a dict, every value converted to the type of its default.
+
+    Missing keys keep the default; an empty value stands for None where the default is None.
+    """
+    section = config['Parameters'] if config.has_section('Parameters') else {}
+    params = dict(DEFAULTS)
+    for key, default in DEFAULTS.items():
+        if key not in section:
+            continue
+        value = section[key].strip()
+        if default is None:
+            params[key] = value or None
+        else:
+            params[key] = type(default)(value)
+    return params
@@ -0,0 +1,341 @@
+# Egyfolyamatos futtatás - az elemzések függőségi gráfként, egyszer betöltött közös adatokon
+import os
+import time
+import argparse
+import configparser
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from Price_loader import load_prices
+from Conditional_vol import conditional_var_cvar, MODELS as VOL_MODELS
+from Downsample import downsample_frame
+from Parameters import load_parameters
+from Export import export
+from Plotting import render_all
+import Instrument
+import Risk_plots
+import Event_study
+import Descriptive
+import Variance
+import Semi_Var
+import VaR_CVaR
+import VaR_CVaR_lookback_3m
+
+
+class Pipeline:
+    """
+    Stages and their dependencies; a stage is a function whose keyword arguments are the
+    results of the stages it depends on (plus settings).
+
+    run() computes only the stages the requested targets need, each once. Independent stages
+    run concurrently on a thread pool; stages registered with main_thread=True (figure
+    rendering: pyplot is not thread-safe) run on the calling thread while no other stage
+    is running.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.timings = {}
+
+    def stage(self, name=None, deps=(), main_thread=False):
+        """Decorator registering a function as a stage."""
+        def register(func):
+            self.stages[name or func.__name__] = {'func': func, 'deps': tuple(deps), 'main_thread': main_thread}
+            return func
+        return register
+
+    def required(self, targets):
+        """The targets and every stage they depend on, in dependency order."""
+        order, seen, active = [], set(), set()
+
+        def visit(name):
+            if name in seen:
+                return
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage {name!r}, available: {sorted(self.stages)}")
+            if name in active:
+                raise ValueError(f"Dependency cycle through stage {name!r}")
+            active.add(name)
+            for dep in self.stages[name]['deps']:
+                visit(dep)
+            active.discard(name)
+            seen.add(name)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def _call(self, name, results, settings):
+        stage = self.stages[name]
+        start = time.perf_counter()
+        with Instrument.stage(name):
+            value = stage['func'](settings, **{dep: results[dep] for dep in stage['deps']})
+        self.timings[name] = time.perf_counter() - start
+        return value
+
+    def run(self, targets=None, settings=None, workers=None):
+        """Run the stages needed for targets (default: all) and return {stage: result}."""
+        pending = self.required(targets or list(self.stages))
+        results = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1)) as pool:
+            while pending or running:
+                ready = [name for name in pending if all(dep in results for dep in self.stages[name]['deps'])]
+                for name in ready:
+                    if not self.stages[name]['main_thread']:
+                        running[pool.submit(self._call, name, results, settings)] = name
+                        pending.remove(name)
+                if not running:
+                    main_ready = [name for name in ready if self.stages[name]['main_thread']]
+                    if not main_ready:
+                        raise RuntimeError(f"Stages cannot be scheduled: {pending}")
+                    results[main_ready[0]] = self._call(main_ready[0], results, settings)
+                    pending.remove(main_ready[0])
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        return results
+
+
+pipeline = Pipeline()
+
+
+def load_settings(config_file='config.ini'):
+    """Paths and the [Parameters] of config.ini (shared with the scripts), plus the pipeline's own settings."""
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    local_dir_base = config['Paths']['local_dir_base']
+    return {
+        'local_dir_base': local_dir_base,
+        'price_path': os.path.join(local_dir_base, config['Paths']['price_file']),
+        **load_parameters(config),
+        'vol_models': VOL_MODELS,  # daily conditional VaR/CVaR: 'ewma' and/or 'garch'
+        'events': Event_study.load_events(Event_study.catalog_path(config)),
+        'event_windows': Event_study.DEFAULT_WINDOWS,
+    }
+
+
+def _render(specs):
+    """render_all with spawned workers: the stage threads are still alive, forking them is unsafe."""
+    return render_all(specs, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _dir(settings, *parts):
+    """Output directory under local_dir_base, created if missing."""
+    path = os.path.join(settings['local_dir_base'], *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# === Ingest and shared derivations ===
+
+@pipeline.stage()
+def prices(settings):
+    return load_prices(settings['price_path'])
+
+
+@pipeline.stage(deps=['prices'])
+def returns(settings, prices):
+    """VaR_CVaR.py's basis data: prices with long/short returns and the calendar columns."""
+    return VaR_CVaR.basis_frame(prices)
+
+
+# === Metrics ===
+
+@pipeline.stage(deps=['prices'])
+def carry(settings, prices):
+    """Descriptive.py: prices brought forward with the cost of carry."""
+    return Descriptive.carry_prices(prices, settings['cost_of_carry_file'], tolerance=settings['carry_tolerance'])
+
+
+@pipeline.stage(deps=['carry'])
+def descriptive(settings, carry):
+    """Descriptive statistics (and skewness) of the carry adjusted price per period."""
+    return Descriptive.period_statistics(carry)
+
+
+@pipeline.stage(deps=['prices'])
+def variance(settings, prices):
+    """Variance.py: period and annual variances, Levene test and the rolling variance."""
+    return Variance.variance_metrics(prices, settings['lookback_roll'])
+
+
+@pipeline.stage(deps=['prices'])
+def volatility_tests(settings, prices):
+    # the permutation pool starts while the other stage threads run: spawn it, as the render workers
+    return Variance.volatility_tests(prices['close'], n_permutations=settings['n_permutations'],
+                                     seed=settings['permutation_seed'], workers=settings['test_workers'],
+                                     mp_context=multiprocessing.get_context('spawn'))
+
+
+@pipeline.stage(deps=['prices'])
+def semi_variance(settings, prices):
+    """Semi_Var.py: rolling semi-variance and LPM of short returns over start..end period."""
+    df = Semi_Var.period_returns(prices, settings['start_period'], settings['end_period'])
+    return Semi_Var.semi_variance(df, settings['lookback_window'], settings['lpm_order'], settings['lpm_target'])
+
+
+@pipeline.stage(deps=['returns'])
+def var_cvar(settings, returns):
+    """VaR_CVaR.py: rolling lookback_q quarter VaR/CVaR, spread, ratio and the quarter's Dummy."""
+    results_df = VaR_CVaR.rolling_results(returns, settings['lookback_q'], settings['confidence_level'],
+                                          settings['var_method'])
+    return {'results': results_df, 'plot': VaR_CVaR.add_dummy(results_df, returns)}
+
+
+@pipeline.stage(deps=['returns'])
+def conditional_var(settings, returns):
+    """Conditional_vol.py: daily VaR/CVaR from EWMA / GARCH(1,1) volatility over the whole history."""
+    long_return = returns.set_index('time')['long_return']
+    return {model: conditional_var_cvar(long_return, model=model, confidence_level=settings['confidence_level'])
+            for model in settings['vol_models']}
+
+
+@pipeline.stage(deps=['returns'])
+def event_study(settings, returns):
+    """Event_study.py: pre/post volatility, semi-variance, VaR and abnormal returns around the catalog events."""
+    return Event_study.event_study(returns.set_index('time')['long_return'], settings['events'],
+                                   windows=settings['event_windows'], confidence_level=settings['confidence_level'])
+
+
+@pipeline.stage(deps=['returns'])
+def var_cvar_3m(settings, returns):
+    """VaR_CVaR_lookback_3m.py: per-quarter VaR/CVaR with bootstrap confidence bands."""
+    cl = settings['confidence_level']
+    results_df = VaR_CVaR_lookback_3m.quarter_results(returns, cl)
+    results_df = VaR_CVaR_lookback_3m.add_bootstrap_bands(results_df, returns, settings['n_resamples'],
+                                                          settings['bootstrap_scheme'], cl)
+    return VaR_CVaR_lookback_3m.add_plot_date(results_df)
+
+
+# === Exports ===
+
+@pipeline.stage(deps=['returns'])
+def basis_export(settings, returns):
+    path = os.path.join(_dir(settings, 'Thesis_Risk/VaR_CVaR'), 'basis.xlsx')
+    return export(returns, path, fmt=settings['export_format'])
+
+
+@pipeline.stage(deps=['var_cvar'])
+def var_export(settings, var_cvar):
+    path = os.path.join(_dir(settings, 'Thesis_Risk/VaR_CVaR'), 'result.xlsx')
+    return export(var_cvar['results'], path, fmt=settings['export_format'])
+
+
+@pipeline.stage(deps=['conditional_var'])
+def conditional_var_export(settings, conditional_var):
+    save_dir = _dir(settings, 'Thesis_Risk/VaR_CVaR')
+    return [export(daily, os.path.join(save_dir, f'conditional_var_{model}.xlsx'), fmt=settings['export_format'])
+            for model, daily in conditional_var.items()]
+
+
+@pipeline.stage(deps=['event_study'])
+def event_study_export(settings, event_study):
+    path = os.path.join(_dir(settings, 'Thesis_Risk/Event_study'), 'event_study.xlsx')
+    return export(event_study, path, fmt=settings['export_format'])
+
+
+@pipeline.stage(deps=['carry'])
+def carry_export(settings, carry):
+    path = os.path.join(_dir(settings, 'Thesis_Risk/Descriptive_Statistics'), 'prices_with_carry.csv')
+    return export(carry, path, fmt=settings['export_format'])
+
+
+@pipeline.stage(deps=['semi_variance'])
+def semi_variance_export(settings, semi_variance):
+    path = os.path.join(_dir(settings, 'Thesis_Risk'), 'TTF_gaz_ar_analizis.xlsx')
+    return export(semi_variance, path, fmt=settings['export_format'], index=True, sheet_name='Price Analysis')
+
+
+@pipeline.stage(deps=['volatility_tests'])
+def volatility_tests_export(settings, volatility_tests):
+    path = os.path.join(_dir(settings, 'Vizualizációk/Variance_py'), 'volatility_tests.csv')
+    return export(volatility_tests, path, fmt=settings['export_format'])
+
+
+# === Figures (rendered on the main thread, see Pipeline) ===
+
+@pipeline.stage(deps=['variance'], main_thread=True)
+def variance_plots(settings, variance):
+    save_dir = _dir(settings, 'Vizualizációk/Variance_py')
+    return _render(Variance.figures(variance, settings['events'], save_dir, settings['lookback_roll']))
+
+
+@pipeline.stage(deps=['var_cvar'], main_thread=True)
+def var_plots(settings, var_cvar):
+    var_dir = _dir(settings, 'Thesis_Risk/VaR_CVaR')
+    return _render([
+        {'path': os.path.join(var_dir, 'risk_metrics_over_time.png'), 'draw': Risk_plots.draw_var_cvar,
+         'kwargs': {'results_df': var_cvar['plot']}, 'figsize': (12, 8), 'dpi': 100},
+        {'path': os.path.join(var_dir, 'var_spread_and_mean.png'), 'draw': Risk_plots.draw_var_spread,
+         'kwargs': {'results_df': var_cvar['plot']}, 'figsize': (12, 8), 'dpi': 100},
+    ])
+
+
+@pipeline.stage(deps=['var_cvar_3m'], main_thread=True)
+def var_3m_plots(settings, var_cvar_3m):
+    return _render([
+        {'path': os.path.join(_dir(settings, 'Thesis_Risk/Vizualizációk'), 'risk_metrics_over_time_modified.png'),
+         'draw': Risk_plots.draw_var_cvar_bands, 'kwargs': {'results_df': var_cvar_3m, 'events': settings['events']},
+         'figsize': (10, 6), 'dpi': 100},
+    ])
+
+
+@pipeline.stage(deps=['semi_variance'], main_thread=True)
+def semi_variance_plots(settings, semi_variance):
+    events = settings['events']
+    plot_df = downsample_frame(semi_variance, 'time', ['semi_variance', 'lpm'], keep_dates=list(events))
+    kwargs = {key: settings[key] for key in ('lookback_window', 'start_period', 'end_period', 'lpm_order', 'lpm_target')}
+    return _render([
+        {'path': os.path.join(_dir(settings, 'Thesis_Risk/Vizualizációk'), 'SV.png'),
+         'draw': Risk_plots.draw_semi_variance, 'kwargs': dict(kwargs, df=plot_df, events=events),
+         'figsize': (12, 8), 'dpi': 100},
+    ])
+
+
+@pipeline.stage(deps=['carry'], main_thread=True)
+def descriptive_plots(settings, carry):
+    return _render([
+        {'path': os.path.join(_dir(settings, 'Thesis_Risk/Descriptive_Statistics'),
+                              'distributions_with_averages_corrected.png'),
+         'draw': Risk_plots.draw_carry_distributions,
+         'kwargs': {'war_prices': carry.loc[carry['Dummy'] == 1, 'price_with_carry'],
+                    'non_war_prices': carry.loc[carry['Dummy'] == 0, 'price_with_carry']},
+         'figsize': (10, 6)},
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the thesis analyses as one dependency graph.')
+    parser.add_argument('targets', nargs='*', help='stages to produce (default: all)')
+    parser.add_argument('--config', default='config.ini')
+    parser.add_argument('--workers', type=int, default=None, help='threads for independent stages')
+    parser.add_argument('--list', action='store_true', help='list the stages and their dependencies')
+    parser.add_argument('--profile', nargs='?', const='profile.jsonl', default=None,
+                        help='write per-stage timing and memory as JSON lines (stages then run one at a time)')
+    parser.add_argument('--format', choices=['xlsx', 'csv', 'parquet', 'feather'], default=None,
+                        help='write every export in this format (default: xlsx / csv per file)')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, stage in pipeline.stages.items():
+            print(f"{name:<24} <- {', '.join(stage['deps']) or '-'}")
+        return
+
+    if args.profile:
+        # tracemalloc peaks are process-wide, concurrent stages would share them
+        Instrument.enable(args.profile)
+        args.workers = 1
+    settings = load_settings(args.config)
+    if args.format:
+        settings['export_format'] = args.format
+    results = pipeline.run(args.targets or None, settings=settings, workers=args.workers)
+    for name in pipeline.required(args.targets or list(pipeline.stages)):
+        print(f"{name:<24} {pipeline.timings[name]:8.2f} s")
+    if 'descriptive' in results:
+        print(results['descriptive'])
+
+
+if __name__ == '__main__':
+    main()
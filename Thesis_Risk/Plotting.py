@@ -0,0 +1,114 @@
+# Ábra-renderelés - Agg backend, párhuzamos mentés, tartalom-hash alapján kihagyja a változatlan ábrákat
+import os
+import json
+import pickle
+import hashlib
+import inspect
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+import numpy as np
+import pandas as pd
+
+# THESIS_HEADLESS=1: no windows, plt.show() never blocks (batch server)
+HEADLESS = os.environ.get('THESIS_HEADLESS', '0') not in ('', '0')
+if HEADLESS:
+    matplotlib.use('Agg')
+
+MANIFEST_NAME = '.plot_manifest.json'
+
+
+def show():
+    """plt.show() for interactive runs, a no-op (closing the figures) when headless."""
+    import matplotlib.pyplot as plt
+    if HEADLESS:
+        plt.close('all')
+    else:
+        plt.show()
+
+
+def _update_hash(digest, value):
+    """Feed a figure input into the hash: frames by content, everything else by repr/pickle."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        digest.update(repr(getattr(value, 'columns', getattr(value, 'name', None))).encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=str):
+            digest.update(str(key).encode())
+            _update_hash(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _update_hash(digest, item)
+    else:
+        digest.update(pickle.dumps(value))
+
+
+def figure_hash(spec):
+    """Hash of a figure spec: drawing code (its whole module), input data and style (figsize, dpi)."""
+    digest = hashlib.sha256()
+    digest.update(spec['draw'].__qualname__.encode())
+    digest.update(inspect.getsource(inspect.getmodule(spec['draw'])).encode())
+    _update_hash(digest, spec.get('kwargs', {}))
+    _update_hash(digest, {'figsize': spec.get('figsize'), 'dpi': spec.get('dpi', 300)})
+    return digest.hexdigest()
+
+
+def _init_worker():
+    """Pool initializer: the worker processes only save files, so they draw on Agg."""
+    matplotlib.use('Agg')
+
+
+def render_figure(spec):
+    """Draw one figure and save it; spec['draw'](**kwargs) draws on the current figure."""
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=spec.get('figsize'))
+    try:
+        spec['draw'](**spec.get('kwargs', {}))
+        fig.savefig(spec['path'], dpi=spec.get('dpi', 300), bbox_inches='tight')
+    finally:
+        plt.close(fig)
+    return spec['path']
+
+
+def render_all(specs, manifest_dir=None, workers=None, force=False, mp_context=None):
+    """
+    Render the figures whose inputs changed since the last run, in parallel.
+
+    specs: list of dicts with 'path', 'draw' (module-level function), 'kwargs', 'figsize'
+    and 'dpi'. The hash of every saved figure is kept in a manifest next to the images;
+    a figure is skipped when its hash matches and the file still exists. Figures are drawn on
+    Agg in worker processes (the caller's backend is left alone), so with more than one figure
+    to render call it from code behind an if __name__ == '__main__' guard. mp_context: the
+    multiprocessing context of the pool (default: the process-wide start method).
+    Returns the list of paths that were rendered.
+    """
+    if not specs:
+        return []
+    if manifest_dir is None:
+        manifest_dir = os.path.dirname(specs[0]['path'])
+    manifest_path = os.path.join(manifest_dir, MANIFEST_NAME)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+
+    hashes = {spec['path']: figure_hash(spec) for spec in specs}
+    todo = [spec for spec in specs
+            if force or manifest.get(spec['path']) != hashes[spec['path']] or not os.path.exists(spec['path'])]
+
+    if workers is None:
+        workers = min(len(todo), os.cpu_count() or 1)
+    if workers > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context, initializer=_init_worker) as pool:
+            rendered = list(pool.map(render_figure, todo))
+    else:
+        rendered = [render_figure(spec) for spec in todo]
+
+    for path in rendered:
+        manifest[path] = hashes[path]
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return rendered
@@ -0,0 +1,168 @@
+# Több kontraktusos portfólió VaR/CVaR - gördülő kovarianciamátrix rang-egy frissítésekkel
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+from Rolling_risk import step_ends
+
+
+class RollingCovariance:
+    """
+    Running pairwise-complete covariance of a window of return vectors (NaN = no quote).
+
+    Rows enter and leave with rank-one updates of the sums, O(p^2) each, instead of
+    recomputing the covariance over the whole window. Every pair of contracts keeps its own
+    count and sums over the rows where both are quoted, so a contract that is not listed yet
+    or has expired simply drops out instead of adding zero returns. Values are centred on a
+    fixed shift to keep the sums well conditioned.
+    """
+
+    def __init__(self, n_assets, shift=None):
+        self.shift = np.zeros(n_assets) if shift is None else np.asarray(shift, dtype=float)
+        self.reset(np.empty((0, n_assets)))
+
+    def _parts(self, x):
+        y = np.asarray(x, dtype=float) - self.shift
+        valid = ~np.isnan(y)
+        return np.where(valid, y, 0.0), valid.astype(float)
+
+    def add(self, x):
+        y, m = self._parts(x)
+        self.n += 1
+        self.count += np.outer(m, m)
+        self.s += np.outer(y, m)
+        self.ss += np.outer(y, y)
+
+    def remove(self, x):
+        y, m = self._parts(x)
+        self.n -= 1
+        self.count -= np.outer(m, m)
+        self.s -= np.outer(y, m)
+        self.ss -= np.outer(y, y)
+
+    def reset(self, rows):
+        """Recompute the sums exactly from the rows currently in the window."""
+        y, m = self._parts(rows)
+        self.n = len(y)
+        self.count = m.T @ m  # count[i, j]: rows where both i and j are quoted
+        self.s = y.T @ m      # s[i, j]: sum of asset i over those rows
+        self.ss = y.T @ y
+
+    @property
+    def counts(self):
+        """Quoted rows per asset."""
+        return np.diag(self.count).copy()
+
+    @property
+    def mean(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.diag(self.s) / self.counts + self.shift
+
+    @property
+    def cov(self):
+        """Pairwise-complete sample covariance; NaN for pairs quoted together on fewer than 2 rows."""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = (self.ss - self.s * self.s.T / self.count) / (self.count - 1)
+        return np.where(self.count > 1, cov, np.nan)
+
+
+def portfolio_var(prices, weights, step=1, window=252, lookback=None, confidence_level=0.975,
+                  min_periods=20, side='long', refresh=1000):
+    """
+    Parametric portfolio VaR/CVaR with marginal and component VaR per contract.
+
+    prices: wide frame (sorted DatetimeIndex x contracts). Gaps inside a contract's life are
+    forward filled (zero return that day); before its first and after its last quote the
+    contract has no returns, and each window uses only the contracts live in it (at least
+    min_periods returns), with pairwise-complete covariances. Contracts with zero weight
+    are dropped. Two live contracts that never traded together in a window get covariance 0.
+    weights: position weights per contract (Series aligned on the columns, or array);
+    the short side uses the negated weights.
+    step/window/lookback follow Rolling_risk.rolling_var_cvar (window in rows, or lookback
+    x rows per step when lookback is given). Sums are recomputed exactly every refresh
+    updates to stop rounding drift.
+    Returns (risk, marginal_var, component_var); component VaR sums to the portfolio VaR,
+    contracts not live in a window are NaN there.
+    """
+    prices = prices.sort_index()
+    if isinstance(weights, pd.Series):
+        weights = weights.reindex(prices.columns).fillna(0.0)
+    w = np.asarray(weights, dtype=float)
+    if side == 'short':
+        w = -w
+    elif side != 'long':
+        raise ValueError("side must be 'long' or 'short'")
+    held = w != 0
+    prices, w = prices.loc[:, held], w[held]
+
+    # fill gaps only between a contract's first and last quote
+    prices = prices.ffill().where(prices.bfill().notna())
+    returns = prices.pct_change(fill_method=None).iloc[1:]
+    returns = returns.dropna(how='all')
+
+    x = returns.to_numpy(dtype=float)
+    index = pd.DatetimeIndex(returns.index)
+    ends, sizes = step_ends(index, step)
+    windows = sizes * lookback if lookback is not None else np.full(len(ends), window)
+
+    alpha = 1 - confidence_level
+    z = norm.ppf(alpha)
+    tail = norm.pdf(z) / alpha
+
+    # centre on the means of the first window the sums cover (lookback sets its size, not window)
+    head = x[max(ends[0] - windows[0] + 1, 0):ends[0] + 1] if len(ends) else x[:0]
+    quoted = (~np.isnan(head)).sum(axis=0)
+    shift = np.nansum(head, axis=0) / np.maximum(quoted, 1)  # 0 for contracts not quoted yet
+    acc = RollingCovariance(x.shape[1], shift=shift)
+    lo = hi = 0
+    updates = 0
+    rows, marginal, component = [], [], []
+    for end, size in zip(ends, windows):
+        start = max(end - size + 1, 0)
+        if updates >= refresh or start >= hi:
+            acc.reset(x[start:end + 1])
+            lo, hi, updates = start, end + 1, 0
+        while hi <= end:
+            acc.add(x[hi])
+            hi += 1
+            updates += 1
+        while lo < start:
+            acc.remove(x[lo])
+            lo += 1
+            updates += 1
+        while lo > start:
+            lo -= 1
+            acc.add(x[lo])
+            updates += 1
+
+        live = acc.counts >= max(min_periods, 2)
+        if not live.any():
+            continue
+        mu = acc.mean[live]
+        cov = np.nan_to_num(acc.cov[np.ix_(live, live)])
+        w_live = w[live]
+        sigma_w = cov @ w_live
+        port_mean = mu @ w_live
+        port_std = np.sqrt(max(w_live @ sigma_w, 0.0))
+        if port_std == 0:
+            continue
+
+        # Euler allocation of the normal VaR: VaR = sum_i w_i * dVaR/dw_i
+        marginal_i = np.full(len(w), np.nan)
+        marginal_i[live] = mu + z * sigma_w / port_std
+        rows.append({
+            'time': index[end],
+            'n': acc.n,
+            'contracts': int(live.sum()),
+            'mean': port_mean,
+            'std.s': port_std,
+            'var': port_mean + z * port_std,
+            'cvar': port_mean - tail * port_std,
+        })
+        marginal.append(marginal_i)
+        component.append(w * marginal_i)
+
+    risk = pd.DataFrame(rows)
+    times = risk['time'] if len(risk) else []
+    marginal_var = pd.DataFrame(marginal, index=times, columns=returns.columns)
+    component_var = pd.DataFrame(component, index=times, columns=returns.columns)
+    return risk, marginal_var, component_var
@@ -0,0 +1,143 @@
+# Shared price loader - az Excel árfolyamfájlt egyszer alakítjuk át oszlopos cache-be
+import os
+import json
+import hashlib
+import pandas as pd
+from Instrument import profiled
+import Compact
+
+try:
+    import pyarrow  # noqa: F401 - Parquet engine
+    CACHE_FORMAT = 'parquet'
+except ImportError:
+    CACHE_FORMAT = 'pickle'
+
+CACHE_VERSION = 1
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """Return the sha256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_paths(source_path, cache_dir=None):
+    """Return (data, metadata) paths of the cache belonging to source_path."""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(source_path)), '.cache')
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    ext = '.parquet' if CACHE_FORMAT == 'parquet' else '.pkl'
+    return os.path.join(cache_dir, stem + ext), os.path.join(cache_dir, stem + '.meta.json')
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f, indent=2)
+
+
+def _cache_is_valid(source_path, data_path, meta_path):
+    """Check the cache against the source file: mtime/size first, sha256 only if those changed."""
+    meta = _read_meta(meta_path)
+    if meta is None or meta.get('version') != CACHE_VERSION or not os.path.exists(data_path):
+        return False
+    stat = os.stat(source_path)
+    if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+        return True
+    # mtime changed (e.g. git checkout, copy) - the content may still be the same
+    if meta['sha256'] != file_hash(source_path):
+        return False
+    meta['mtime_ns'] = stat.st_mtime_ns
+    meta['size'] = stat.st_size
+    _write_meta(meta_path, meta)
+    return True
+
+
+@profiled('read_source')
+def _read_source(source_path):
+    """Parse the workbook (or csv) once: parse time, sort, typed columns."""
+    if source_path.lower().endswith('.csv'):
+        df = pd.read_csv(source_path)
+    else:
+        df = pd.read_excel(source_path)
+    df['time'] = pd.to_datetime(df['time'])
+    df = df.sort_values('time', kind='stable').set_index('time')
+    for col in df.columns:
+        if df[col].dtype == object:
+            converted = pd.to_numeric(df[col], errors='coerce')
+            if converted.notna().sum() == df[col].notna().sum():
+                df[col] = converted
+    if 'Dummy' in df.columns and df['Dummy'].notna().all():
+        df['Dummy'] = df['Dummy'].astype('int8')
+    return df
+
+
+def build_cache(source_path, cache_dir=None):
+    """Convert the source file into the columnar cache and return the frame."""
+    data_path, meta_path = cache_paths(source_path, cache_dir)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    df = _read_source(source_path)
+    if CACHE_FORMAT == 'parquet':
+        df.to_parquet(data_path)
+    else:
+        df.to_pickle(data_path)
+    stat = os.stat(source_path)
+    _write_meta(meta_path, {
+        'version': CACHE_VERSION,
+        'source': os.path.abspath(source_path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': file_hash(source_path),
+        'format': CACHE_FORMAT,
+        'rows': len(df),
+        'columns': list(df.columns),
+    })
+    return df
+
+
+def load_prices(source_path, columns=None, cache_dir=None, use_cache=True, compact=None):
+    """
+    Load the price history with a sorted DatetimeIndex named 'time'.
+
+    The first call parses the workbook and writes a typed columnar cache next to it
+    (or into cache_dir); later calls read the cache until the source file changes.
+    Only the requested columns are read from a Parquet cache. compact (default: the
+    THESIS_COMPACT switch) returns float32 prices and downcast integers, see Compact.py.
+    """
+    if compact is None:
+        compact = Compact.ENABLED
+    if not use_cache:
+        df = _read_source(source_path)
+        df = df if columns is None else df[list(columns)]
+    else:
+        data_path, meta_path = cache_paths(source_path, cache_dir)
+        if not _cache_is_valid(source_path, data_path, meta_path):
+            df = build_cache(source_path, cache_dir)
+            df = df if columns is None else df[list(columns)]
+        elif CACHE_FORMAT == 'parquet':
+            df = pd.read_parquet(data_path, columns=None if columns is None else list(columns))
+        else:
+            df = pd.read_pickle(data_path)
+            if columns is not None:
+                df = df[list(columns)]
+    return Compact.compact_frame(df) if compact else df
+
+
+def load_prices_from_config(config, columns=None):
+    """Resolve price_file (and optional cache_dir) from config.ini and load the prices."""
+    local_dir_base = config['Paths']['local_dir_base']
+    price_path = os.path.join(local_dir_base, config['Paths']['price_file'])
+    cache_dir = config['Paths'].get('cache_dir')
+    if cache_dir:
+        cache_dir = os.path.join(local_dir_base, cache_dir)
+    return load_prices(price_path, columns=columns, cache_dir=cache_dir)
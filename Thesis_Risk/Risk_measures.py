@@ -0,0 +1,123 @@
+# VaR / CVaR becslők - a VaR szkriptek közös függvényei
+import numpy as np
+from scipy.stats import norm, skew, kurtosis
+
+
+# VaR function assuming normally distributed returns (parametric approach)
+def calculate_var(returns, confidence_level=0.975):
+    """
+    Calculate the Value at Risk (VaR) assuming normally distributed returns.
+    """
+    mean_val = returns.mean()
+    std_val = returns.std(ddof=1)
+    var = norm.ppf(1 - confidence_level, loc=mean_val, scale=std_val)
+    return var
+
+
+# CVaR function for normally distributed returns
+def calculate_cvar(returns, confidence_level=0.975):
+    """
+    Calculate the Conditional Value at Risk (CVaR) using the Normal assumptions.
+    """
+    mean_val = returns.mean()
+    std_val = returns.std(ddof=1)
+    alpha = 1 - confidence_level  # tail probability, e.g., 0.025 for 97.5% confidence
+    z = norm.ppf(alpha)
+    pdf_z = norm.pdf(z)
+    cvar = mean_val - std_val * (pdf_z / alpha)
+    return cvar
+
+
+def parametric_var_cvar(mean, std, confidence_level=0.975):
+    """
+    Normal VaR and CVaR for arrays of means and standard deviations of long returns.
+
+    Short returns are the negated long returns, so both sides come from the same moments.
+    Returns (long_var, short_var, long_cvar, short_cvar).
+    """
+    mean = np.asarray(mean, dtype=float)
+    std = np.asarray(std, dtype=float)
+    alpha = 1 - confidence_level
+    z = norm.ppf(alpha)
+    tail = norm.pdf(z) / alpha
+    return mean + z * std, -mean + z * std, mean - tail * std, -mean - tail * std
+
+
+def _tail_size(n, alpha):
+    """Number of observations averaged for the empirical expected shortfall."""
+    return np.maximum(np.ceil(alpha * n).astype(int), 1)
+
+
+# Historical simulation: empirical quantile and tail mean, no distribution assumption
+def historical_var(returns, confidence_level=0.975):
+    """
+    Calculate the Value at Risk (VaR) as the empirical (1 - confidence_level) quantile.
+    """
+    values = np.asarray(returns, dtype=float)
+    values = values[~np.isnan(values)]
+    return np.quantile(values, 1 - confidence_level)
+
+
+def historical_cvar(returns, confidence_level=0.975):
+    """
+    Calculate the Conditional Value at Risk (CVaR) as the mean of the worst ceil(alpha * n) returns.
+    """
+    values = np.sort(np.asarray(returns, dtype=float))
+    values = values[~np.isnan(values)]
+    k = _tail_size(len(values), 1 - confidence_level)
+    return values[:k].mean()
+
+
+def cornish_fisher_z(z, skewness, excess_kurt):
+    """Cornish-Fisher expansion of the standard normal quantile z."""
+    return (z
+            + (z ** 2 - 1) * skewness / 6
+            + (z ** 3 - 3 * z) * excess_kurt / 24
+            - (2 * z ** 3 - 5 * z) * skewness ** 2 / 36)
+
+
+# Integration grid for the modified CVaR: midpoints of the tail probabilities (0, alpha)
+_CF_GRID = (np.arange(200) + 0.5) / 200
+
+
+def cornish_fisher_var_cvar(mean, std, skewness, excess_kurt, confidence_level=0.975):
+    """
+    Cornish-Fisher (modified) VaR and CVaR from arrays of the first four moments of long returns.
+
+    The CVaR averages the Cornish-Fisher quantile over the tail probabilities (0, alpha).
+    Short returns have the same std and kurtosis with mean and skew negated, so both tails
+    come from the same moments. Returns (long_var, short_var, long_cvar, short_cvar).
+    """
+    mean, std, skewness, excess_kurt = (np.asarray(a, dtype=float)[..., None]
+                                        for a in (mean, std, skewness, excess_kurt))
+    alpha = 1 - confidence_level
+    z = norm.ppf(alpha)
+    z_tail = norm.ppf(alpha * _CF_GRID)
+
+    long_var = mean + cornish_fisher_z(z, skewness, excess_kurt) * std
+    short_var = -mean + cornish_fisher_z(z, -skewness, excess_kurt) * std
+    long_cvar = mean + cornish_fisher_z(z_tail, skewness, excess_kurt).mean(axis=-1, keepdims=True) * std
+    short_cvar = -mean + cornish_fisher_z(z_tail, -skewness, excess_kurt).mean(axis=-1, keepdims=True) * std
+    return tuple(a[..., 0] for a in (long_var, short_var, long_cvar, short_cvar))
+
+
+def cornish_fisher_var(returns, confidence_level=0.975):
+    """
+    Calculate the modified Value at Risk (VaR) using the Cornish-Fisher expansion.
+    """
+    values = np.asarray(returns, dtype=float)
+    values = values[~np.isnan(values)]
+    long_var, _, _, _ = cornish_fisher_var_cvar(values.mean(), values.std(ddof=1),
+                                                skew(values), kurtosis(values), confidence_level)
+    return float(long_var)
+
+
+def cornish_fisher_cvar(returns, confidence_level=0.975):
+    """
+    Calculate the modified Conditional Value at Risk (CVaR) using the Cornish-Fisher expansion.
+    """
+    values = np.asarray(returns, dtype=float)
+    values = values[~np.isnan(values)]
+    _, _, long_cvar, _ = cornish_fisher_var_cvar(values.mean(), values.std(ddof=1),
+                                                 skew(values), kurtosis(values), confidence_level)
+    return float(long_cvar)
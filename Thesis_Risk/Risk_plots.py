@@ -0,0 +1,108 @@
+# VaR/CVaR, semi-variancia és carry ábrák - rajzoló függvények az aktuális figure-re (mint Variance_plots)
+import pandas as pd
+import seaborn as sns
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+
+
+# VaR_CVaR.py first plot: risk metrics over time (VaR and CVaR)
+def draw_var_cvar(results_df, dummy_change_date='2022-02-24', title='VaR és CVaR (lookback = 1y)'):
+    plt.plot(results_df['plot_date'], results_df['long_var'], marker='o', label='Long VaR', linewidth=2)
+    plt.plot(results_df['plot_date'], results_df['short_var'], marker='o', label='Short VaR', linewidth=2)
+    plt.plot(results_df['plot_date'], results_df['long_cvar'], marker='o', label='Long CVaR', linewidth=2)
+    plt.plot(results_df['plot_date'], results_df['short_cvar'], marker='o', label='Short CVaR', linewidth=2)
+
+    # Use the exact date when dummy turns to 1
+    plt.axvline(x=pd.to_datetime(dummy_change_date), color='red', linestyle='-', linewidth=2,
+                label='Dummy = 1')
+
+    plt.xlabel('Idő', fontsize=12)
+    plt.ylabel('Várható veszteség alpha = 97.5%', fontsize=12)
+    plt.title(title, fontsize=14)
+    plt.legend(fontsize=10)
+    plt.grid(True)
+    plt.gca().invert_yaxis()  # Invert Y-axis as requested
+    plt.tight_layout()
+
+
+# VaR_CVaR.py second plot: VaR spread and mean return over time
+def draw_var_spread(results_df):
+    plt.plot(results_df['plot_date'], results_df['var_spread'], marker='o', label='VaR Spread (Long - Short)',
+             linewidth=2)
+    plt.plot(results_df['plot_date'], results_df['mean'], marker='o', label='Mean Return', linewidth=2)
+
+    # Draw a horizontal thick black line at Y = 0
+    plt.axhline(y=0, color='black', linestyle='-', linewidth=3, label='Y = 0')
+
+    plt.xlabel('Idő', fontsize=12)
+    plt.ylabel('Hányad', fontsize=12)
+    plt.title('long short VaR spread és az átlagos hozam', fontsize=14)
+    plt.legend(fontsize=10)
+    plt.grid(True)
+    plt.gca().invert_yaxis()  # Invert Y-axis as requested
+    plt.tight_layout()
+
+
+# VaR_CVaR_lookback_3m.py: quarterly VaR/CVaR with bootstrap bands and event markers
+def draw_var_cvar_bands(results_df, events):
+    plt.plot(results_df['plot_date'], results_df['long_var'], marker='o', label='long VaR')
+    plt.plot(results_df['plot_date'], results_df['short_var'], marker='o', label='short VaR')
+    plt.plot(results_df['plot_date'], results_df['long_cvar'], marker='o', label='long CVaR')
+    plt.plot(results_df['plot_date'], results_df['short_cvar'], marker='o', label='short CVaR')
+    if 'long_var_lo' in results_df.columns:
+        plt.fill_between(results_df['plot_date'], results_df['long_var_lo'], results_df['long_var_hi'], alpha=0.15)
+        plt.fill_between(results_df['plot_date'], results_df['short_var_lo'], results_df['short_var_hi'], alpha=0.15)
+
+    ax = plt.gca()
+    # Add vertical markers for each major event
+    for event_date_str, event in events.items():
+        ax.axvline(x=pd.to_datetime(event_date_str), color=event['color'], linestyle='--', linewidth=1)
+
+    plt.xlabel('Idő')
+    plt.ylabel('Kockázati mutató')
+    plt.title('VaR és CVaR idősor')
+    plt.legend()
+    plt.grid(True)
+
+    # Flip the y-axis so that more negative values are plotted upward
+    ax.invert_yaxis()
+    plt.tight_layout()
+
+
+# Semi_Var.py: rolling semi-variance and LPM with event markers
+def draw_semi_variance(df, events, lookback_window, start_period, end_period, lpm_order, lpm_target):
+    plt.plot(df['time'], df['semi_variance'], color='blue', label='Semi-Variance')
+    plt.plot(df['time'], df['lpm'], color='gray', linewidth=0.8, label=f'LPM({lpm_order}, {lpm_target})')
+    plt.xlabel('Év')
+    plt.ylabel('Semi-Variance')
+    plt.title(f"{lookback_window} napos rolling SV ({start_period} - {end_period}) - short TFN1!")
+    plt.grid()
+
+    # Event markers
+    for date, event in events.items():
+        plt.axvline(pd.to_datetime(date), color=event['color'], linestyle='--', linewidth=1.5, label=event['label'])
+
+    # Format x-axis
+    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter("%Y"))
+    plt.gca().xaxis.set_major_locator(mdates.YearLocator())
+    plt.xticks(rotation=45)
+    plt.legend(loc='upper left')
+    plt.tight_layout()
+
+
+# Descriptive.py: price distributions with cost of carry correction
+def draw_carry_distributions(war_prices, non_war_prices):
+    sns.kdeplot(war_prices, label='Háborús időszak', color='red', fill=True)
+    sns.kdeplot(non_war_prices, label='Nem háborús időszak', color='blue', fill=True, alpha=0.5)
+
+    # Add average markers
+    war_avg = war_prices.mean()
+    non_war_avg = non_war_prices.mean()
+    plt.axvline(war_avg, color='red', linestyle='--', linewidth=2, label=f'Átlag (háborús): {war_avg:.2f} €')
+    plt.axvline(non_war_avg, color='blue', linestyle='--', linewidth=2,
+                label=f'Átlag (nem háborús): {non_war_avg:.2f} €')
+
+    plt.title('Áreloszlás összehasonlítása (Cost of Carry korrekciós tényezővel)')
+    plt.xlabel('Záróár (€)')
+    plt.ylabel('Density')
+    plt.legend()
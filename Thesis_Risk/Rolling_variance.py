@@ -0,0 +1,82 @@
+# Gördülő variancia több időalapú ablakra egyszerre (5D ... 365D), egyetlen kumulált összegből
+import numpy as np
+import pandas as pd
+
+
+def compensated_cumsum(x, block=256):
+    """
+    Prefix sums of x as a (hi, lo) pair with a leading zero: hi + lo is the running total.
+
+    Sums inside a block of `block` values use np.cumsum; the block offsets are carried with
+    Kahan summation and the final addition keeps its rounding error (TwoSum) in lo, so the
+    error does not grow with the length of the history.
+    """
+    n = len(x)
+    padded = np.zeros(-(-n // block) * block)
+    padded[:n] = x
+    within = np.cumsum(padded.reshape(-1, block), axis=1)
+
+    # exclusive block offsets, Kahan-compensated
+    offsets_hi = np.empty(len(within))
+    offsets_lo = np.empty(len(within))
+    total = comp = 0.0
+    for i, block_total in enumerate(within[:, -1].tolist()):
+        offsets_hi[i] = total
+        offsets_lo[i] = -comp
+        y = block_total - comp
+        t = total + y
+        comp = (t - total) - y
+        total = t
+
+    # TwoSum of offset + within-block sum
+    a = offsets_hi[:, None]
+    hi = a + within
+    bb = hi - a
+    lo = (a - (hi - bb)) + (within - bb) + offsets_lo[:, None]
+    return np.r_[0.0, hi.ravel()[:n]], np.r_[0.0, lo.ravel()[:n]]
+
+
+def rolling_variance(series, windows=('5D', '30D', '365D'), start=None, end=None, ddof=1, std=False):
+    """
+    Rolling variance (or std) of a DatetimeIndex series for several time-based windows at once.
+
+    Each window covers (t - window, t], like series.rolling('30D').var(), and NaNs are
+    skipped. Window bounds come from searchsorted on the index; all windows share one set
+    of compensated cumulative sums of x and x^2. Only the output range [start, end] (index
+    labels, partial strings allowed) plus the warm-up of the longest window is touched.
+    Returns a DataFrame with one column per window.
+    """
+    series = series.sort_index()
+    windows = list(windows)
+    deltas = [pd.Timedelta(w) for w in windows]
+
+    out = series.index.slice_indexer(start, end)
+    out_times = series.index[out]
+    if len(out_times) == 0:
+        return pd.DataFrame(index=out_times, columns=windows, dtype=float)
+
+    # restrict to the output range plus the warm-up of the longest window
+    first = series.index.searchsorted(out_times[0] - max(deltas), side='right')
+    last = series.index.searchsorted(out_times[-1], side='right')
+    times = series.index[first:last].to_numpy()
+    x = series.to_numpy(dtype=float)[first:last]
+
+    valid = ~np.isnan(x)
+    shift = x[valid].mean() if valid.any() else 0.0
+    xc = np.where(valid, x - shift, 0.0)
+    s1_hi, s1_lo = compensated_cumsum(xc)
+    s2_hi, s2_lo = compensated_cumsum(xc * xc)
+    count_cs = np.r_[0, np.cumsum(valid)]
+
+    right = np.searchsorted(times, out_times.to_numpy(), side='right')
+    result = {}
+    for label, delta in zip(windows, deltas):
+        left = np.searchsorted(times, (out_times - delta).to_numpy(), side='right')
+        n = count_cs[right] - count_cs[left]
+        s1 = (s1_hi[right] - s1_hi[left]) + (s1_lo[right] - s1_lo[left])
+        s2 = (s2_hi[right] - s2_hi[left]) + (s2_lo[right] - s2_lo[left])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var = (s2 - s1 * s1 / n) / (n - ddof)
+        var = np.where(n > ddof, np.maximum(var, 0.0), np.nan)
+        result[label] = np.sqrt(var) if std else var
+    return pd.DataFrame(result, index=out_times)
@@ -2,95 +2,94 @@ import os
 import configparser
 import pandas as pd
 import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-
-# Load sensitive configuration from config.ini
-config = configparser.ConfigParser()
-config.read('config.ini')
-
-# Read only sensitive values
-local_dir_base = config.get('Paths', 'local_dir_base')
-price_path = os.path.join(local_dir_base, config.get('Paths', 'price_file'))
-
-# Hardcoded
-output_path = os.path.join(local_dir_base, 'Thesis_Risk/TTF_gaz_ar_analizis.xlsx')
-plot_save_path = os.path.join(local_dir_base, 'Thesis_Risk/Vizualizációk/SV.png')
-lookback_window = 20
-start_period = 2019
-end_period = 2025
-
-major_events = {
-    '2022-02-24': {
-        'label': 'Ukrajna invázió kezdete',
-        'color': 'darkred',
-        'description': 'Orosz invázió kezdete\n(azonnali ellátási félelmek)'
-    },
-    '2022-03-15': {
-        'label': 'Szankciók bejelentése',
-        'color': 'darkorange',
-        'description': 'Nyugati szankciók bejelentése\n(gázellátási bizonytalanság)'
-    },
-    '2022-09-26': {
-        'label': 'Nord Stream szabotázs',
-        'color': 'purple',
-        'description': 'Csővezeték robbanások\n(akut ellátási válság)'
-    }
-}
-
-def semi_variance(df, window):
+from Plotting import show
+import Risk_plots
+from Price_loader import load_prices
+from LPM import rolling_partial_moments
+from Downsample import downsample_frame
+from Export import export
+from Event_study import load_events, catalog_path
+from Parameters import load_parameters
+import Instrument
+import Compact
+from Compact import add_calendar
+
+
+def period_returns(prices, start_period, end_period, lazy=False):
+    """Short returns of the years start_period..end_period and their downside part (filtered_ret)."""
+    # Filter data (index lookup on the sorted DatetimeIndex); the rows keep their position
+    # in the price file as label, like the exported index always did
+    rows = prices.index.slice_indexer(str(start_period), str(end_period))
+    df = prices[['close', 'Dummy']].iloc[rows].reset_index()
+    df.index = pd.RangeIndex(len(prices))[rows]
+
+    # Extract date parts (compact mode: only added to the export, chunk by chunk)
+    add_calendar(df, ['year', 'month', 'day'], lazy=lazy)
+
+    # Calculate returns
+    df['returns'] = -df['close'].pct_change()
+    df['filtered_ret'] = df['returns'].clip(upper=0.0).fillna(0.0)
+    return df
+
+
+def semi_variance(df, window, lpm_order=2, lpm_target=0.0):
+    """Rolling variance of the downside returns and rolling LPM(lpm_order, lpm_target) of the returns."""
     df['semi_variance'] = df['filtered_ret'].rolling(window=window).var()
+    df['lpm'] = rolling_partial_moments(df['returns'], orders=[lpm_order], targets=[lpm_target],
+                                        windows=[window]).iloc[:, 0]
     return df
 
-# Load and process data
-try:
-    df = pd.read_excel(
-        price_path,
-        parse_dates=['time'],
-        usecols=['time', 'close', 'Dummy']
-    )
-except FileNotFoundError:
-    print(f"File not found: {price_path}")
-    exit()
-
-# Extract date parts
-df['year'] = df['time'].dt.year
-df['month'] = df['time'].dt.month
-df['day'] = df['time'].dt.day
-
-# Filter data
-df = df[(df['year'] >= start_period) & (df['year'] <= end_period)]
-
-# Calculate returns
-df['returns'] = -df['close'].pct_change()
-df['filtered_ret'] = df['returns'].apply(lambda x: x if x < 0.0 else 0.0)
-df = semi_variance(df, lookback_window)
-
-# Plot
-plt.figure(figsize=(12, 8))
-plt.plot(df['time'], df['semi_variance'], color='blue', label='Semi-Variance')
-plt.xlabel('Év')
-plt.ylabel('Semi-Variance')
-plt.title(f"{lookback_window} napos rolling SV ({start_period} - {end_period}) - short TFN1!")
-plt.grid()
-
-# Event markers
-for date, event in major_events.items():
-    event_date = pd.to_datetime(date)
-    plt.axvline(event_date, color=event['color'], linestyle='--', linewidth=1.5, label=event['label'])
-
-# Format x-axis
-date_format = mdates.DateFormatter("%Y")
-plt.gca().xaxis.set_major_formatter(date_format)
-plt.gca().xaxis.set_major_locator(mdates.YearLocator())
-plt.xticks(rotation=45)
-plt.legend(loc='upper left')
-
-# Save + show plot
-plt.tight_layout()
-plt.savefig(plot_save_path)
-plt.show()
-print(f"Plot saved: {plot_save_path}")
-
-# Export data
-df.to_excel(output_path, sheet_name='Price Analysis')
-print(f"File saved: {output_path}")
+
+if __name__ == '__main__':
+    # Load sensitive configuration from config.ini
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+
+    # Read only sensitive values
+    local_dir_base = config.get('Paths', 'local_dir_base')
+    price_path = os.path.join(local_dir_base, config.get('Paths', 'price_file'))
+
+    # Hardcoded
+    output_path = os.path.join(local_dir_base, 'Thesis_Risk/TTF_gaz_ar_analizis.xlsx')
+    plot_save_path = os.path.join(local_dir_base, 'Thesis_Risk/Vizualizációk/SV.png')
+    export_columns = None  # None exports every column
+
+    # Analysis parameters ([Parameters] in config.ini)
+    params = load_parameters(config)
+    lookback_window = params['lookback_window']
+    lpm_order = params['lpm_order']
+    lpm_target = params['lpm_target']
+    start_period = params['start_period']
+    end_period = params['end_period']
+
+    major_events = load_events(catalog_path(config))  # shared catalog, see Event_study.py
+
+    Instrument.begin('load')
+    # Load and process data
+    try:
+        df = load_prices(price_path, columns=['close', 'Dummy'])
+    except FileNotFoundError:
+        print(f"File not found: {price_path}")
+        exit()
+
+    Instrument.begin('returns')
+    df = period_returns(df, start_period, end_period, lazy=Compact.ENABLED)
+    Instrument.begin('metrics')
+    df = semi_variance(df, lookback_window, lpm_order, lpm_target)
+
+    Instrument.begin('plot')
+    # Plot
+    # Long series are downsampled (min-max per bucket); spikes and event dates stay exact
+    plot_df = downsample_frame(df, 'time', ['semi_variance', 'lpm'], keep_dates=list(major_events))
+    plt.figure(figsize=(12, 8))
+    Risk_plots.draw_semi_variance(plot_df, major_events, lookback_window, start_period, end_period, lpm_order, lpm_target)
+    plt.savefig(plot_save_path)
+    show()
+    print(f"Plot saved: {plot_save_path}")
+
+    Instrument.begin('export')
+    # Export data
+    output_path = export(df, output_path, fmt=params['export_format'], columns=export_columns, index=True, sheet_name='Price Analysis',
+                         calendar=['year', 'month', 'day'] if Compact.ENABLED else None)
+    print(f"File saved: {output_path}")
+    Instrument.end()
@@ -0,0 +1,135 @@
+# Paraméter-sweep - lookback ablakok és konfidenciaszintek rácsa párhuzamosan, közös memóriából
+import os
+import argparse
+import itertools
+import configparser
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from Price_loader import load_prices
+from Rolling_risk import rolling_var_cvar
+
+PARAM_COLUMNS = ['lookback_window', 'lookback_roll', 'confidence_level', 'lookback_q']
+
+# Worker side views of the shared arrays, filled by _attach
+_shared = {}
+
+
+def _attach(specs):
+    """Pool initializer: map the shared arrays read-only, without copying them."""
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        array.flags.writeable = False
+        _shared[name] = array
+        _shared['_shm_' + name] = shm  # keep the mapping alive
+
+
+def _series():
+    index = pd.DatetimeIndex(_shared['time'].view('datetime64[ns]'))
+    return pd.Series(_shared['close'], index=index, copy=False)
+
+
+def _tidy(frame, analysis, params):
+    frame = frame.melt(id_vars='time', var_name='metric', value_name='value').dropna(subset=['value'])
+    frame.insert(0, 'analysis', analysis)
+    for i, col in enumerate(PARAM_COLUMNS):
+        frame.insert(1 + i, col, params.get(col, np.nan))
+    return frame
+
+
+def run_task(task):
+    """Evaluate one (analysis, parameters) combination on the shared close series."""
+    analysis, params = task
+    close = _series()
+    if analysis == 'variance':
+        rolling_var = close.rolling(f"{params['lookback_roll']}D").var()
+        frame = pd.DataFrame({'time': close.index, 'rolling_var': rolling_var.to_numpy()})
+    elif analysis == 'semi_variance':
+        returns = -close.pct_change()
+        filtered_ret = returns.where(returns < 0.0, 0.0)
+        semi = filtered_ret.rolling(window=params['lookback_window']).var()
+        frame = pd.DataFrame({'time': close.index, 'semi_variance': semi.to_numpy()})
+    elif analysis == 'var':
+        frame = rolling_var_cvar(close.pct_change(), step='Q', lookback=params['lookback_q'],
+                                 confidence_level=params['confidence_level'])
+        frame = frame[['time', 'std.s', 'mean', 'long_var', 'short_var', 'long_cvar', 'short_cvar']]
+    else:
+        raise ValueError(f"Unknown analysis {analysis!r}")
+    return _tidy(frame, analysis, params)
+
+
+def build_tasks(lookback_windows=(20,), lookback_rolls=(30,), confidence_levels=(0.975,), lookback_qs=(4,)):
+    """Every combination of the parameters each analysis actually depends on."""
+    tasks = [('semi_variance', {'lookback_window': w}) for w in lookback_windows]
+    tasks += [('variance', {'lookback_roll': w}) for w in lookback_rolls]
+    tasks += [('var', {'confidence_level': cl, 'lookback_q': q})
+              for cl, q in itertools.product(confidence_levels, lookback_qs)]
+    return tasks
+
+
+def sweep(close, lookback_windows=(20,), lookback_rolls=(30,), confidence_levels=(0.975,),
+          lookback_qs=(4,), workers=1):
+    """
+    Run the parameter grid over one close series and return a single tidy table
+    (analysis, parameters, time, metric, value).
+
+    The close prices and timestamps are placed once in shared memory; workers map them
+    read-only, so tasks carry only their parameters.
+    """
+    close = close.sort_index()
+    arrays = {
+        'close': close.to_numpy(dtype=np.float64),
+        'time': close.index.to_numpy(dtype='datetime64[ns]').view(np.int64),
+    }
+    tasks = build_tasks(lookback_windows, lookback_rolls, confidence_levels, lookback_qs)
+
+    blocks = []
+    try:
+        specs = {}
+        for name, array in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+            blocks.append(shm)
+            specs[name] = (shm.name, array.shape, array.dtype.str)
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(specs,)) as pool:
+                frames = list(pool.map(run_task, tasks))
+        else:
+            _attach(specs)
+            frames = [run_task(task) for task in tasks]
+            _shared.clear()
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    return pd.concat(frames, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parameter sweep over lookback windows and confidence levels')
+    parser.add_argument('--lookback-window', type=int, nargs='+', default=[20], help='Semi_Var.py window (rows)')
+    parser.add_argument('--lookback-roll', type=int, nargs='+', default=[30], help='Variance.py window (days)')
+    parser.add_argument('--confidence-level', type=float, nargs='+', default=[0.975])
+    parser.add_argument('--lookback-q', type=int, nargs='+', default=[4], help='VaR lookback (quarters)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--output', default='sweep_results.csv')
+    parser.add_argument('--config', default='config.ini')
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    local_dir_base = config['Paths']['local_dir_base']
+    price_path = os.path.join(local_dir_base, config['Paths']['price_file'])
+
+    close = load_prices(price_path, columns=['close'])['close']
+    results = sweep(close, args.lookback_window, args.lookback_roll, args.confidence_level,
+                    args.lookback_q, workers=args.workers)
+    results.to_csv(args.output, index=False)
+    print(f"{len(results)} rows saved: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
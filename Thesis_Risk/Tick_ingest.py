@@ -0,0 +1,181 @@
+# Tick / perces TTF adatok beolvasása darabokban, OHLC bárokká és napi realizált varianciává alakítva
+import os
+import configparser
+import numpy as np
+import pandas as pd
+from Carry import asof_join
+
+# Start of the war period when no Dummy series is given (first Dummy = 1 day of prices.xlsx)
+WAR_START = '2022-02-24'
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'ticks']
+
+
+def _csv_chunks(path, chunk_size, time_col, price_col, volume_col, sep, time_format):
+    usecols = [time_col, price_col] + ([volume_col] if volume_col else [])
+    for chunk in pd.read_csv(path, sep=sep, usecols=usecols, chunksize=chunk_size):
+        times = pd.to_datetime(chunk[time_col], format=time_format).to_numpy(dtype='datetime64[ns]')
+        volume = chunk[volume_col].to_numpy(dtype=float) if volume_col else np.ones(len(chunk))
+        yield times, chunk[price_col].to_numpy(dtype=float), volume
+
+
+def _npy_chunks(path, chunk_size, time_col, price_col, volume_col):
+    # structured array (time as datetime64 or int64 ns), memory-mapped: only one slice is in RAM
+    data = np.load(path, mmap_mode='r')
+    for start in range(0, len(data), chunk_size):
+        part = data[start:start + chunk_size]
+        times = np.asarray(part[time_col])
+        times = times.astype('datetime64[ns]') if np.issubdtype(times.dtype, np.datetime64) \
+            else times.astype(np.int64).view('datetime64[ns]')
+        volume = np.asarray(part[volume_col], dtype=float) if volume_col else np.ones(len(part))
+        yield times, np.asarray(part[price_col], dtype=float), volume
+
+
+def _parquet_chunks(path, chunk_size, time_col, price_col, volume_col):
+    import pyarrow.parquet as pq
+    columns = [time_col, price_col] + ([volume_col] if volume_col else [])
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=columns):
+        chunk = batch.to_pandas()
+        times = pd.to_datetime(chunk[time_col]).to_numpy(dtype='datetime64[ns]')
+        volume = chunk[volume_col].to_numpy(dtype=float) if volume_col else np.ones(len(chunk))
+        yield times, chunk[price_col].to_numpy(dtype=float), volume
+
+
+def read_tick_chunks(path, chunk_size=1_000_000, time_col='time', price_col='price', volume_col=None,
+                     sep=',', time_format=None):
+    """
+    Yield (times, prices, volumes) numpy arrays of at most chunk_size ticks.
+
+    .csv is streamed with read_csv(chunksize=...), .npy (structured array) is memory-mapped
+    and .parquet is read batch by batch. Without volume_col every tick counts as volume 1.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in ('.csv', '.txt', '.gz'):
+        return _csv_chunks(path, chunk_size, time_col, price_col, volume_col, sep, time_format)
+    if ext == '.npy':
+        return _npy_chunks(path, chunk_size, time_col, price_col, volume_col)
+    if ext == '.parquet':
+        return _parquet_chunks(path, chunk_size, time_col, price_col, volume_col)
+    raise ValueError(f"Unsupported tick file type {ext!r}, expected .csv, .npy or .parquet")
+
+
+def _bars_of_chunk(times, prices, volumes, freq):
+    """OHLC bars of one time-ordered chunk; bar labels are the left edge of each interval."""
+    labels = pd.DatetimeIndex(times).floor(freq).to_numpy()
+    starts = np.r_[0, np.flatnonzero(labels[1:] != labels[:-1]) + 1]
+    ends = np.r_[starts[1:], len(labels)]
+    return {
+        'time': labels[starts],
+        'open': prices[starts],
+        'high': np.maximum.reduceat(prices, starts),
+        'low': np.minimum.reduceat(prices, starts),
+        'close': prices[ends - 1],
+        'volume': np.add.reduceat(volumes, starts),
+        'ticks': ends - starts,
+    }
+
+
+def resample_ticks(chunks, freq='5min'):
+    """
+    Stream tick chunks into OHLC bars of a fixed frequency ('1min', '5min', '1h', ...).
+
+    Ticks must be time-ordered across chunks (within a chunk they are sorted). The ticks of
+    the last, possibly unfinished bar of a chunk are carried over to the next chunk, so bars
+    are exact whatever the chunk size; NaN and non-positive prices are dropped.
+    Returns a DataFrame of bars with a DatetimeIndex named 'time'.
+    """
+    parts = {col: [] for col in ['time'] + BAR_COLUMNS}
+    carry = None
+    last_time = None
+    for times, prices, volumes in chunks:
+        keep = np.isfinite(prices) & (prices > 0)
+        times, prices, volumes = times[keep], prices[keep], volumes[keep]
+        if len(times) == 0:
+            continue
+        order = np.argsort(times, kind='stable')
+        times, prices, volumes = times[order], prices[order], volumes[order]
+        if last_time is not None and times[0] < last_time:
+            raise ValueError(f"Ticks are not time-ordered across chunks: {times[0]} after {last_time}")
+        last_time = times[-1]
+
+        if carry is not None:
+            times = np.concatenate([carry[0], times])
+            prices = np.concatenate([carry[1], prices])
+            volumes = np.concatenate([carry[2], volumes])
+        bars = _bars_of_chunk(times, prices, volumes, freq)
+
+        # hold back the last bar: the next chunk may still add ticks to it
+        held = int(bars['ticks'][-1])
+        carry = times[-held:], prices[-held:], volumes[-held:]
+        for col in parts:
+            parts[col].append(bars[col][:-1])
+
+    if carry is not None:
+        bars = _bars_of_chunk(*carry, freq)
+        for col in parts:
+            parts[col].append(bars[col])
+
+    if not parts['time']:
+        return pd.DataFrame(columns=BAR_COLUMNS, index=pd.DatetimeIndex([], name='time'), dtype=float)
+    out = pd.DataFrame({col: np.concatenate(parts[col]) for col in BAR_COLUMNS},
+                       index=pd.DatetimeIndex(np.concatenate(parts['time']), name='time'))
+    out['ticks'] = out['ticks'].astype(np.int64)
+    return out
+
+
+def daily_bars(bars, dummy=None, war_start=WAR_START):
+    """
+    Daily OHLC frame in the prices.xlsx schema (time index, close, Dummy) from intraday bars.
+
+    realized_variance is the sum of squared log returns between consecutive bar closes of the
+    same day (the overnight return is left out); n_bars is the number of bars of the day.
+    Dummy comes from a Dummy series (e.g. load_prices(price_path, ['Dummy'])['Dummy']) by an
+    as-of join, or is 1 from war_start onwards when no series is given.
+    """
+    day = bars.index.normalize()
+    log_close = np.log(bars['close'].to_numpy(dtype=float))
+    ret = np.r_[np.nan, np.diff(log_close)]
+    ret[np.r_[True, day[1:] != day[:-1]]] = np.nan
+    grouped = pd.DataFrame({'sq_ret': ret ** 2}, index=bars.index).groupby(day)
+
+    daily = bars.groupby(day).agg(open=('open', 'first'), high=('high', 'max'), low=('low', 'min'),
+                                  close=('close', 'last'), volume=('volume', 'sum'), ticks=('ticks', 'sum'),
+                                  n_bars=('close', 'size'))
+    daily['realized_variance'] = grouped['sq_ret'].sum(min_count=1)
+    daily.index.name = 'time'
+
+    if dummy is not None:
+        flags = asof_join(daily.index, dummy.astype(float)).iloc[:, 0]
+        daily['Dummy'] = flags.fillna(0).to_numpy().astype('int8')
+    else:
+        daily['Dummy'] = (daily.index >= pd.Timestamp(war_start)).astype('int8')
+    return daily
+
+
+def ingest_ticks(path, freq='5min', chunk_size=1_000_000, dummy=None, war_start=WAR_START, **read_kwargs):
+    """Read a tick file in chunks and return (intraday bars, daily frame); see read_tick_chunks."""
+    bars = resample_ticks(read_tick_chunks(path, chunk_size=chunk_size, **read_kwargs), freq=freq)
+    return bars, daily_bars(bars, dummy=dummy, war_start=war_start)
+
+
+def write_daily(daily, path):
+    """Write the daily frame as csv/xlsx with a time column, readable by Price_loader.load_prices."""
+    out = daily.reset_index()
+    if path.lower().endswith('.csv'):
+        out.to_csv(path, index=False)
+    else:
+        out.to_excel(path, index=False)
+    return path
+
+
+if __name__ == '__main__':
+    config = configparser.ConfigParser()
+    config.read('config.ini')
+    local_dir_base = config['Paths']['local_dir_base']
+    tick_path = os.path.join(local_dir_base, config['Paths']['tick_file'])
+    daily_path = os.path.join(local_dir_base, config['Paths'].get('tick_daily_file', 'Thesis_Risk/tick_prices.csv'))
+    bar_freq = config['Paths'].get('bar_freq', '5min')
+
+    bars, daily = ingest_ticks(tick_path, freq=bar_freq, time_col=config['Paths'].get('tick_time_col', 'time'),
+                               price_col=config['Paths'].get('tick_price_col', 'price'))
+    write_daily(daily, daily_path)
+    print(f"{len(bars)} {bar_freq} bars, {len(daily)} days written to {daily_path}")
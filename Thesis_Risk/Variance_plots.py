@@ -0,0 +1,89 @@
+# Variance.py ábrái - rajzoló függvények az aktuális figure-re (Plotting.render_all párhuzamosan menti őket)
+import pandas as pd
+import seaborn as sns
+import matplotlib.pyplot as plt
+
+
+# Plot 1: Price Timeline (from 2019 onwards)
+def draw_timeline(data, events=None, xlabel='Idő', line_label='Záróár'):
+    if line_label:
+        plt.plot(data['time'], data['close'], label=line_label, color='blue')
+    else:
+        plt.plot(data['time'], data['close'])
+    plt.fill_between(data['time'], data['close'],
+                     where=data['Dummy'] == 1,
+                     color='red', alpha=0.3, label='Háborús időszak')
+
+    for date_str, event in (events or {}).items():
+        event_date = pd.to_datetime(date_str)
+        plt.axvline(event_date, color=event['color'], linestyle='--', alpha=0.7, label=event['label'])
+
+    plt.title('TFN1! idősor')
+    plt.xlabel(xlabel)
+    plt.ylabel('€/MWh/nap * 24')
+    plt.legend()
+
+
+# Plot 2: Annual Price Variance (Log Scale)
+def draw_annual_variance(annual_variance):
+    sns.barplot(x='Year', y='Annual_Variance', data=annual_variance, palette='viridis')
+    plt.yscale('log')
+    plt.title('Éves árvariancia (log skála)')
+    plt.xticks(rotation=45)
+
+
+# Plot 3: War vs Non-War Annual Variance
+def draw_war_comparison(comparison_df):
+    sns.barplot(x=comparison_df.index, y='War_Variance', data=comparison_df, color='red')
+    sns.barplot(x=comparison_df.index, y='Non_War_Variance', data=comparison_df, color='blue', alpha=0.5)
+    plt.title('Háborús és nem háborús időszakok éves varianciája')
+    plt.legend(['Háború', 'Nem háború'])
+    plt.xticks(rotation=45)
+
+
+# Plot 4: Price Distribution Comparison with Average Markers
+def draw_distributions(war_close, non_war_close):
+    sns.kdeplot(war_close, label='Háborús időszak', color='red', fill=True)
+    sns.kdeplot(non_war_close, label='Nem háborús időszak', color='blue', fill=True, alpha=0.5)
+    war_data_avg = war_close.mean()
+    non_war_data_avg = non_war_close.mean()
+    plt.axvline(war_data_avg, color='red', linestyle='--', linewidth=2, label=f'Átlag (háborús): {war_data_avg:.2f}')
+    plt.axvline(non_war_data_avg, color='blue', linestyle='--', linewidth=2,
+                label=f'Átlag (nem háborús): {non_war_data_avg:.2f}')
+    plt.title('Áreloszlás összehasonlítása')
+    plt.xlabel('Záróár')
+    plt.legend()
+
+
+# Plot 5: Enhanced Rolling Variance with Legend
+def draw_rolling_variance(rolling_var, events, lookback_roll):
+    ax = rolling_var.plot(title=str(lookback_roll) + ' napos gördülő variancia kulcsfontosságú eseményekkel (2021-2023)',
+                          color='steelblue', linewidth=2)
+    y_max = rolling_var.max() * 1.15
+    for date_str, event in events.items():
+        date = pd.to_datetime(date_str)
+        ax.axvline(date, color=event['color'], linestyle='--', alpha=0.7, label=event['label'])
+        ax.annotate(event['description'],
+                    xy=(date, y_max),
+                    xytext=(date + pd.Timedelta(days=30), y_max * 1.05),
+                    arrowprops=dict(arrowstyle="->", color=event['color']),
+                    fontsize=9,
+                    color=event['color'],
+                    rotation=30)
+    plt.legend(loc='upper left', fontsize=10)
+    plt.xlabel('Dátum')
+    plt.ylabel('Variancia')
+    plt.grid(True)
+
+
+# Combined plot: plots 1-4 on a 2x2 grid
+def draw_combined(timeline, annual_variance, comparison_df, war_close, non_war_close):
+    plt.subplot(2, 2, 1)
+    draw_timeline(timeline, xlabel='Dátum', line_label=None)
+    plt.subplot(2, 2, 2)
+    draw_annual_variance(annual_variance)
+    plt.subplot(2, 2, 3)
+    draw_war_comparison(comparison_df)
+    plt.subplot(2, 2, 4)
+    draw_distributions(war_close, non_war_close)
+    plt.tight_layout(pad=0.4, w_pad=0.5, h_pad=1.0)
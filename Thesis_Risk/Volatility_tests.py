@@ -0,0 +1,170 @@
+# Volatilitás hipotézisvizsgálatok kötegelten - Levene/Brown-Forsythe/Bartlett/F-teszt minden párra
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.stats import f as f_dist, chi2
+
+TESTS = ('levene_mean', 'brown_forsythe', 'bartlett', 'f_test')
+
+
+def group_stats(groups):
+    """
+    Per-group summaries every pairwise test is built from, computed once per group:
+    size, variance and sum / sum of squares of the mean- and median-centred deviations.
+    """
+    rows = {}
+    for name, values in groups.items():
+        x = np.asarray(values, dtype=float)
+        x = x[~np.isnan(x)]
+        dev_mean = np.abs(x - x.mean())
+        dev_median = np.abs(x - np.median(x))
+        rows[name] = {
+            'n': len(x),
+            'var': x.var(ddof=1),
+            'sum_mean': dev_mean.sum(), 'sumsq_mean': (dev_mean ** 2).sum(),
+            'sum_median': dev_median.sum(), 'sumsq_median': (dev_median ** 2).sum(),
+        }
+    return pd.DataFrame(rows).T
+
+
+def _anova_two_groups(n_a, s_a, ss_a, n_b, s_b, ss_b):
+    """One-way ANOVA F for two groups from sizes, sums and sums of squares (vectorized)."""
+    total = n_a + n_b
+    grand = (s_a + s_b) / total
+    between = n_a * (s_a / n_a - grand) ** 2 + n_b * (s_b / n_b - grand) ** 2
+    within = (ss_a - s_a ** 2 / n_a) + (ss_b - s_b ** 2 / n_b)
+    return (total - 2) * between / within
+
+
+def pairwise_tests(stats, pairs):
+    """Statistic and p-value of every test for every (a, b) pair, evaluated as arrays."""
+    a = stats.loc[[p[0] for p in pairs]].astype(float).reset_index(drop=True)
+    b = stats.loc[[p[1] for p in pairs]].astype(float).reset_index(drop=True)
+    n_a, n_b = a['n'].to_numpy(), b['n'].to_numpy()
+    dfd = n_a + n_b - 2
+    out = {}
+
+    for test, key in (('levene_mean', 'mean'), ('brown_forsythe', 'median')):
+        w = _anova_two_groups(n_a, a['sum_' + key].to_numpy(), a['sumsq_' + key].to_numpy(),
+                              n_b, b['sum_' + key].to_numpy(), b['sumsq_' + key].to_numpy())
+        out[test] = (w, f_dist.sf(w, 1, dfd))
+
+    var_a, var_b = a['var'].to_numpy(), b['var'].to_numpy()
+    pooled = ((n_a - 1) * var_a + (n_b - 1) * var_b) / dfd
+    bartlett = (dfd * np.log(pooled) - (n_a - 1) * np.log(var_a) - (n_b - 1) * np.log(var_b))
+    bartlett /= 1 + (1 / (n_a - 1) + 1 / (n_b - 1) - 1 / dfd) / 3
+    out['bartlett'] = (bartlett, chi2.sf(bartlett, 1))
+
+    ratio = var_a / var_b
+    tail = np.minimum(f_dist.cdf(ratio, n_a - 1, n_b - 1), f_dist.sf(ratio, n_a - 1, n_b - 1))
+    out['f_test'] = (ratio, np.minimum(2 * tail, 1.0))
+    return out
+
+
+def _brown_forsythe_matrix(samples, n_a):
+    """Brown-Forsythe statistic of each row of samples (first n_a columns = group a)."""
+    a, b = samples[:, :n_a], samples[:, n_a:]
+    dev_a = np.abs(a - np.median(a, axis=1, keepdims=True))
+    dev_b = np.abs(b - np.median(b, axis=1, keepdims=True))
+    return _anova_two_groups(n_a, dev_a.sum(axis=1), (dev_a ** 2).sum(axis=1),
+                             b.shape[1], dev_b.sum(axis=1), (dev_b ** 2).sum(axis=1))
+
+
+def permutation_pvalue(task):
+    """Permutation p-value of the Brown-Forsythe statistic for one pair, in blocks of permutations."""
+    x_a, x_b, n_permutations, seed, block = task
+    pooled = np.concatenate([x_a, x_b])
+    observed = _brown_forsythe_matrix(pooled[None, :], len(x_a))[0]
+    rng = np.random.default_rng(seed)
+    exceed = 0
+    done = 0
+    while done < n_permutations:
+        size = min(block, n_permutations - done)
+        samples = rng.permuted(np.broadcast_to(pooled, (size, len(pooled))), axis=1)
+        exceed += np.count_nonzero(_brown_forsythe_matrix(samples, len(x_a)) >= observed)
+        done += size
+    return (exceed + 1) / (n_permutations + 1)
+
+
+def adjust_pvalues(p_values, method='holm'):
+    """Multiple-testing correction: 'bonferroni', 'holm' or 'fdr_bh' (Benjamini-Hochberg)."""
+    p = np.asarray(p_values, dtype=float)
+    m = len(p)
+    if m == 0:
+        return p
+    if method == 'bonferroni':
+        return np.minimum(p * m, 1.0)
+    order = np.argsort(p)
+    ranked = p[order]
+    if method == 'holm':
+        adjusted = np.maximum.accumulate((m - np.arange(m)) * ranked)
+    elif method == 'fdr_bh':
+        adjusted = np.minimum.accumulate((m / np.arange(1, m + 1) * ranked)[::-1])[::-1]
+    else:
+        raise ValueError(f"Unknown method {method!r}")
+    out = np.empty(m)
+    out[order] = np.minimum(adjusted, 1.0)
+    return out
+
+
+def volatility_tests(groups, pairs, n_permutations=0, seed=None, workers=1, block=500, mp_context=None):
+    """
+    Run every test on every (group_a, group_b) pair and return one tidy results table.
+
+    groups: {name: values}. With n_permutations > 0 a permutation p-value of the
+    Brown-Forsythe statistic is added per pair (spread over workers processes; call with
+    workers > 1 only behind an if __name__ == '__main__' guard; mp_context: the pool's
+    multiprocessing context). p-values are corrected within each test across all pairs
+    (Bonferroni, Holm, Benjamini-Hochberg).
+    """
+    stats = group_stats(groups)
+    pairs = list(pairs)
+    tests = pairwise_tests(stats, pairs)
+
+    p_perm = np.full(len(pairs), np.nan)
+    if n_permutations > 0:
+        seeds = np.random.SeedSequence(seed).spawn(len(pairs))
+        clean = {name: np.asarray(v, dtype=float)[~np.isnan(np.asarray(v, dtype=float))]
+                 for name, v in groups.items()}
+        tasks = [(clean[a], clean[b], n_permutations, s, block) for (a, b), s in zip(pairs, seeds)]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=mp_context) as pool:
+                p_perm = np.array(list(pool.map(permutation_pvalue, tasks)))
+        else:
+            p_perm = np.array([permutation_pvalue(task) for task in tasks])
+
+    frames = []
+    for test in TESTS:
+        statistic, p_value = tests[test]
+        frame = pd.DataFrame({
+            'group_a': [p[0] for p in pairs],
+            'group_b': [p[1] for p in pairs],
+            'n_a': stats.loc[[p[0] for p in pairs], 'n'].to_numpy(dtype=int),
+            'n_b': stats.loc[[p[1] for p in pairs], 'n'].to_numpy(dtype=int),
+            'test': test,
+            'statistic': statistic,
+            'p_value': p_value,
+            'p_perm': p_perm if test == 'brown_forsythe' else np.nan,
+        })
+        for method in ('bonferroni', 'holm', 'fdr_bh'):
+            frame['p_' + method] = adjust_pvalues(frame['p_value'], method)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def year_vs_baselines(series, years=None, baselines=None, n_permutations=0, seed=None, workers=1, mp_context=None):
+    """
+    Every calendar year of a DatetimeIndex series against every baseline period.
+
+    baselines: {name: (start, end)} label slices; default is the pre-2021 period.
+    The permutation arguments go to volatility_tests.
+    """
+    if baselines is None:
+        baselines = {'pre-2021': (None, '2020-12-31')}
+    if years is None:
+        years = sorted(series.index.year.unique())
+    groups = {name: series.loc[start:end] for name, (start, end) in baselines.items()}
+    groups.update({str(year): series.loc[str(year)] for year in years})
+    pairs = [(base, str(year)) for base in baselines for year in years]
+    return volatility_tests(groups, pairs, n_permutations=n_permutations, seed=seed, workers=workers,
+                            mp_context=mp_context)